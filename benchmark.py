@@ -0,0 +1,193 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy
+import simulate
+
+class Workload:
+  """A fixed piece of work to time. Every run of it is seeded the same so it always does the same work.
+  """
+  def __init__(self, name: str, fn, num_runs: int):
+    """Create a workload
+
+    Args:
+      name (str): Name of the workload
+      fn (function): Called with a seed. Does the work.
+      num_runs (int): Number of runs (or rounds) the work is made of
+    """
+    self.name = name
+    self.fn = fn
+    self.num_runs = num_runs
+
+def scalar_runs(num_dice: int, points_to_meet: int, num_runs: int):
+  def fn(seed: int):
+    random.seed(seed)
+    for i in range(num_runs):
+      simulate.simulate_single_run(simulate.board, simulate.sims[0].multipliers, num_dice, points_to_meet)
+  return fn
+
+def batch_runs(num_dice: int, points_to_meet: int, num_runs: int):
+  def fn(seed: int):
+    simulate.simulate_batch_runs(simulate.board, simulate.sims[0].multipliers, num_dice, points_to_meet, num_runs, rng=numpy.random.default_rng(seed))
+  return fn
+
+def success_rate(engine: str, goal_points: int, num_dice: int):
+  def fn(seed: int):
+    # start from nothing so every run works out the whole table
+    simulate.success_rate_solvers.clear()
+    simulate.calculate_success_rate(goal_points, num_dice, engine=engine, seed=seed)
+  return fn
+
+def tiers(num_rounds: int, num_dice: int):
+  def fn(seed: int):
+    simulate.simulation_tiers({ 20000: simulate.sims[0], 40000: simulate.sims[1] }, simulate.board, num_rounds, num_dice, seed=seed)
+  return fn
+
+workloads = [
+  Workload('scalar_400_dice', scalar_runs(400, math.inf, 200), 200),
+  Workload('batch_400_dice', batch_runs(400, math.inf, 10000), 10000),
+  Workload('scalar_100k_points', scalar_runs(math.inf, 100_000, 100), 100),
+  Workload('batch_100k_points', batch_runs(math.inf, 100_000, 10000), 10000),
+  Workload('success_rate_batch', success_rate('batch', 20000, 100), 10000),
+  Workload('success_rate_exact', success_rate('exact', 10000, 20), 1),
+  Workload('simulation_tiers', tiers(300, 200), 300),
+]
+
+@contextlib.contextmanager
+def count_rolls():
+  """Count every roll of the dice the engines do, however many dice it uses, while in the context
+
+  Yields:
+    list[int]: Holds the number of rolls done so far
+  """
+  counted = [0]
+  roll, batch_roll = simulate.CompiledBoard.roll, simulate.CompiledBoard.batch_roll
+
+  def counted_roll(self, multiplier, result):
+    counted[0] += 1
+    return roll(self, multiplier, result)
+
+  def counted_batch_roll(self, result, rows, multipliers, rng):
+    counted[0] += len(rows)
+    return batch_roll(self, result, rows, multipliers, rng)
+
+  simulate.CompiledBoard.roll, simulate.CompiledBoard.batch_roll = counted_roll, counted_batch_roll
+  try:
+    yield counted
+  finally:
+    simulate.CompiledBoard.roll, simulate.CompiledBoard.batch_roll = roll, batch_roll
+
+def run_workload(workload: Workload, seed: int, repeat: int, measure_memory: bool = True):
+  """Time a workload and measure its peak memory
+
+  Args:
+    workload (Workload): The workload
+    seed (int): Seed to run it with
+    repeat (int): Number of times to time it. The fastest time is kept.
+    measure_memory (bool, optional): Whether to run it once more under tracemalloc to get the peak memory. Defaults to True.
+
+  Returns:
+    dict: wall_time (seconds), runs_per_sec, rolls_per_sec (rolls of the dice, not dice used. None if it doesn't roll any) and peak_memory_mb
+  """
+  wall_time = math.inf
+  for _ in range(repeat):
+    # the work prints as it goes, which we don't want to time or see
+    with contextlib.redirect_stdout(io.StringIO()):
+      start = time.perf_counter()
+      workload.fn(seed)
+      wall_time = min(wall_time, time.perf_counter() - start)
+
+  # counting the rolls and tracemalloc both slow everything down so they get their own run. Every run is seeded the same so
+  # it does the same rolls as the timed ones.
+  peak_memory_mb = None
+  if (measure_memory):
+    tracemalloc.start()
+  with count_rolls() as rolls, contextlib.redirect_stdout(io.StringIO()):
+    workload.fn(seed)
+  if (measure_memory):
+    peak_memory_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+  return {
+    'wall_time': wall_time,
+    'runs_per_sec': workload.num_runs / wall_time,
+    'rolls_per_sec': rolls[0] / wall_time if rolls[0] else None,
+    'peak_memory_mb': peak_memory_mb,
+  }
+
+def compare(results: dict, baseline: dict, tolerance: float):
+  """Find the workloads that got slower or use more memory than the baseline by more than the tolerance
+
+  Args:
+    results (dict): Results of every workload
+    baseline (dict): Results of every workload in the baseline
+    tolerance (float): How much worse a result can be as a fraction of the baseline, e.g. 0.1 for 10%
+
+  Returns:
+    list[str]: Description of every regression
+  """
+  regressions = []
+  for name, result in results.items():
+    if (name not in baseline):
+      continue
+    for metric in ['wall_time', 'peak_memory_mb']:
+      old, new = baseline[name].get(metric), result.get(metric)
+      if (old is not None and new is not None and new > old * (1 + tolerance)):
+        regressions.append(f'{name} {metric}: {old:.3f} -> {new:.3f} ({new / old - 1:+.1%})')
+  return regressions
+
+def main(argv: list[str] = None):
+  parser = argparse.ArgumentParser(description='Benchmark the simulation engines against a saved baseline')
+  parser.add_argument('--baseline', default='benchmark_baseline.json', help='JSON file with the baseline results')
+  parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+  parser.add_argument('--tolerance', type=float, default=0.1, help='how much worse than the baseline a result can be before it is a regression (default 0.1 = 10%%)')
+  parser.add_argument('--repeat', type=int, default=3, help='number of times to time each workload, keeping the fastest (default 3)')
+  parser.add_argument('--seed', type=int, default=12345, help='seed every workload is run with (default 12345)')
+  parser.add_argument('--no-memory', action='store_true', help="don't measure peak memory")
+  parser.add_argument('workloads', nargs='*', help=f"workloads to run (default all): {', '.join(workload.name for workload in workloads)}")
+  args = parser.parse_args(argv)
+
+  selected = [workload for workload in workloads if not args.workloads or workload.name in args.workloads]
+  baseline = {}
+  if (os.path.exists(args.baseline)):
+    with open(args.baseline) as file:
+      baseline = json.load(file)['results']
+
+  results = {}
+  print(f"{'workload':22} {'wall time':>10} {'runs/s':>10} {'rolls/s':>12} {'peak MB':>9} {'vs baseline':>12}")
+  for workload in selected:
+    result = run_workload(workload, args.seed, args.repeat, not args.no_memory)
+    results[workload.name] = result
+    change = f"{result['wall_time'] / baseline[workload.name]['wall_time'] - 1:+.1%}" if workload.name in baseline else ''
+    rolls_per_sec = f"{result['rolls_per_sec']:,.0f}" if result['rolls_per_sec'] is not None else '-'
+    peak_memory_mb = f"{result['peak_memory_mb']:.1f}" if result['peak_memory_mb'] is not None else '-'
+    print(f"{workload.name:22} {result['wall_time']:>9.3f}s {result['runs_per_sec']:>10,.1f} {rolls_per_sec:>12} {peak_memory_mb:>9} {change:>12}")
+
+  if (args.save):
+    # keep the results of workloads we didn't run this time
+    with open(args.baseline, 'w') as file:
+      json.dump({
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'results': { **baseline, **results },
+      }, file, indent=2)
+    print(f'Saved baseline to {args.baseline}')
+    return 0
+
+  regressions = compare(results, baseline, args.tolerance)
+  for regression in regressions:
+    print(f'REGRESSION {regression}')
+  return 1 if regressions else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
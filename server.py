@@ -0,0 +1,256 @@
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy
+import simulate
+
+class SuccessRateService:
+  """Answers success rate queries from a player's state. Answers are kept in a bounded LRU cache keyed by the quantised state,
+  and a query that is already being worked out is waited on instead of being worked out again.
+  """
+  # fields of a query and their defaults, None if they are required
+  fields = { 'goal': None, 'dice': None, 'points': 0, 'rolls_done': 0, 'tile': 0 }
+  # most a query can ask for, so one query can't tie up a worker for hours. The exact engine works out a table that grows with the
+  # goal and the dice, so it gets lower limits that keep an uncached query to about half a minute.
+  limits = { 'goal': 1_000_000, 'dice': 2_000, 'rolls_done': 10_000 }
+  exact_limits = { 'goal': 100_000, 'dice': 200, 'rolls_done': 10_000 }
+
+  def __init__(self, board: list[simulate.Tile] = simulate.board, multipliers: list[int] = simulate.sims[1].multipliers, engine: str = 'batch', cache_size: int = 10000, points_step: int = 100, workers: int = 1, seed: int = None):
+    """Create the service
+
+    Args:
+      board (list[Tile], optional): The board. Defaults to simulate.board.
+      multipliers (list[int], optional): The multipliers to apply when rolling from each tile. Defaults to the bublite map.
+      engine (str, optional): Engine of calculate_success_rate. Defaults to 'batch'.
+      cache_size (int, optional): Most answers to keep. Defaults to 10000.
+      points_step (int, optional): Current points are rounded down and goals rounded up to a multiple of this, so nearby states share an answer
+        and the answer never overstates the chance. Defaults to 100.
+      workers (int, optional): Number of queries to work out at once. Keep it at 1 for the exact engine. Defaults to 1.
+      seed (int, optional): Seed that every state's random stream is spawned from, so a state always gets the same answer. Defaults to None.
+    """
+    self.board = board
+    self.multipliers = multipliers
+    self.engine = engine
+    self.cache_size = cache_size
+    self.points_step = points_step
+    self.seed = seed if seed is not None else numpy.random.SeedSequence().entropy
+    self.executor = ThreadPoolExecutor(max_workers=workers)
+    self.lock = threading.Lock()
+    self.cache = OrderedDict()
+    # queries being worked out, so identical ones that come in meanwhile wait on the same answer
+    self.in_flight: dict[tuple, Future] = {}
+    self.hits = 0
+    self.misses = 0
+    self.coalesced = 0
+    self.latencies = deque(maxlen=10000)
+
+  def quantise(self, goal: int, dice: int, points: int = 0, rolls_done: int = 0, tile: int = 0):
+    """Get the cache key of a state
+
+    Returns:
+      tuple[int, int, int, int, int]: goal, dice, points, rolls done and tile, with the goal and points rounded to points_step
+    """
+    if (goal <= 0 or dice < 0 or points < 0 or rolls_done < 0 or not 0 <= tile < len(self.board)):
+      raise ValueError('goal must be positive, dice, points and rolls_done not negative and tile on the board')
+    limits = self.exact_limits if self.engine == 'exact' else self.limits
+    for field, value in (('goal', goal), ('dice', dice), ('rolls_done', rolls_done)):
+      if (value > limits[field]):
+        raise ValueError(f'{field} can be at most {limits[field]:,} with the {self.engine} engine')
+    return (-(-goal // self.points_step) * self.points_step, dice, points // self.points_step * self.points_step, rolls_done, tile)
+
+  def compute(self, key: tuple):
+    """Work out the success rate of a quantised state
+    """
+    goal, dice, points, rolls_done, tile = key
+    seed = int(numpy.random.SeedSequence(self.seed, spawn_key=key).generate_state(1)[0])
+    return simulate.calculate_success_rate(goal, dice, points, rolls_done, tile, engine=self.engine, seed=seed, board=self.board, multipliers=self.multipliers, verbose=False)
+
+  def query(self, goal: int, dice: int, points: int = 0, rolls_done: int = 0, tile: int = 0):
+    """Get the success rate of a state
+
+    Args:
+      goal (int): The number of points to aim for
+      dice (int): The number of dice we have
+      points (int, optional): The current number of points we have. Defaults to 0.
+      rolls_done (int, optional): The number of rolls we have done. Defaults to 0.
+      tile (int, optional): The current tile we are on. Defaults to 0.
+
+    Returns:
+      dict: The success rate as a percentage, the state it was worked out for and how the query was answered
+    """
+    start = time.perf_counter()
+    key = self.quantise(goal, dice, points, rolls_done, tile)
+    with self.lock:
+      if (key in self.cache):
+        self.cache.move_to_end(key)
+        self.hits += 1
+        answered, future = 'cache', None
+        success_rate = self.cache[key]
+      elif (key in self.in_flight):
+        self.coalesced += 1
+        answered, future = 'coalesced', self.in_flight[key]
+      else:
+        self.misses += 1
+        answered, future = 'computed', self.executor.submit(self.compute, key)
+        self.in_flight[key] = future
+    # the callback runs straight away if the future is already done, and store takes the lock
+    if (answered == 'computed'):
+      future.add_done_callback(lambda future, key=key: self.store(key, future))
+    if (future is not None):
+      success_rate = future.result()
+    self.latencies.append(time.perf_counter() - start)
+    return { 'success_rate': success_rate, 'state': dict(zip(self.fields, key)), 'answered': answered }
+
+  def store(self, key: tuple, future: Future):
+    """Move a finished query from in flight to the cache, dropping the least recently used answer if the cache is full
+    """
+    with self.lock:
+      del self.in_flight[key]
+      if (future.exception() is None):
+        self.cache[key] = future.result()
+        while (len(self.cache) > self.cache_size):
+          self.cache.popitem(last=False)
+
+  def warm_up(self, goals: list[int] = [20000, 40000, 60000, 80000, 100000], dices: list[int] = range(10, 410, 10)):
+    """Work out the success rate of every goal from the start of the event with every number of dice, so the first players get cached answers
+
+    Args:
+      goals (list[int], optional): Goals to work out. Defaults to every 20,000 points up to 100,000.
+      dices (list[int], optional): Numbers of dice to work out. Defaults to every 10 up to 400.
+    """
+    futures = []
+    for goal in goals:
+      for dice in dices:
+        key = self.quantise(goal, dice)
+        with self.lock:
+          if (key in self.cache or key in self.in_flight):
+            continue
+          future = self.executor.submit(self.compute, key)
+          self.in_flight[key] = future
+        future.add_done_callback(lambda future, key=key: self.store(key, future))
+        futures.append(future)
+    for future in futures:
+      future.result()
+
+  def stats(self):
+    """Get counts of how queries were answered and the latency of the latest ones
+
+    Returns:
+      dict: Cache hits, misses and coalesced queries, cache size, and p50/p99 latency in milliseconds
+    """
+    with self.lock:
+      latencies = numpy.array(self.latencies) * 1000
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'coalesced': self.coalesced,
+        'cache_size': len(self.cache),
+        'in_flight': len(self.in_flight),
+        'p50_ms': float(numpy.percentile(latencies, 50)) if len(latencies) else None,
+        'p99_ms': float(numpy.percentile(latencies, 99)) if len(latencies) else None,
+      }
+
+def make_handler(service: SuccessRateService):
+  class Handler(BaseHTTPRequestHandler):
+    def send_json(self, status: int, body: dict):
+      data = json.dumps(body).encode()
+      self.send_response(status)
+      self.send_header('Content-Type', 'application/json')
+      self.send_header('Content-Length', str(len(data)))
+      # the pages are served from another origin
+      self.send_header('Access-Control-Allow-Origin', '*')
+      self.end_headers()
+      self.wfile.write(data)
+
+    def answer(self, path: str, params: dict):
+      if (path == '/stats'):
+        return self.send_json(200, service.stats())
+      if (path != '/success-rate'):
+        return self.send_json(404, { 'error': f'Unknown path {path}. Use /success-rate or /stats' })
+      try:
+        arguments = {}
+        for field, default in service.fields.items():
+          if (field not in params and default is None):
+            raise ValueError(f'{field} is required')
+          value = params.get(field, default)
+          # query strings are always text, but a JSON number has to be a whole number already
+          if (isinstance(value, str)):
+            value = int(value)
+          elif (isinstance(value, bool) or not isinstance(value, int)):
+            raise ValueError(f'{field} must be a whole number')
+          arguments[field] = value
+        self.send_json(200, service.query(**arguments))
+      except (TypeError, ValueError, OverflowError) as error:
+        self.send_json(400, { 'error': str(error) })
+
+    def do_GET(self):
+      url = urlparse(self.path)
+      self.answer(url.path, { name: values[-1] for name, values in parse_qs(url.query).items() })
+
+    def do_POST(self):
+      try:
+        length = int(self.headers.get('Content-Length', 0))
+        if (length < 0):
+          raise ValueError('it is negative')
+      except (TypeError, ValueError) as error:
+        return self.send_json(400, { 'error': f'Bad Content-Length: {error}' })
+      try:
+        params = json.loads(self.rfile.read(length) or '{}')
+      except ValueError as error:
+        return self.send_json(400, { 'error': f'Body is not JSON: {error}' })
+      if (not isinstance(params, dict)):
+        return self.send_json(400, { 'error': 'Body must be a JSON object' })
+      self.answer(urlparse(self.path).path, params)
+
+    def do_OPTIONS(self):
+      self.send_response(204)
+      self.send_header('Access-Control-Allow-Origin', '*')
+      self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+      self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+      self.end_headers()
+
+    def log_message(self, format: str, *args):
+      pass
+
+  return Handler
+
+def main(argv: list[str] = None):
+  parser = argparse.ArgumentParser(description='Serve success rates of player states as JSON')
+  parser.add_argument('--host', default='127.0.0.1', help='host to listen on (default 127.0.0.1)')
+  parser.add_argument('--port', type=int, default=8000, help='port to listen on (default 8000)')
+  parser.add_argument('--board', help='JSON file of the board (default the board in simulate.py)')
+  parser.add_argument('--maps', help='JSON file of the multiplier maps (default sims in simulate.py)')
+  parser.add_argument('--map', default='bublite', dest='label', help='label of the multiplier map to use (default bublite)')
+  parser.add_argument('--engine', choices=['scalar', 'batch', 'exact'], default='batch', help='engine of calculate_success_rate (default batch)')
+  parser.add_argument('--cache-size', type=int, default=10000, help='most answers to keep (default 10,000)')
+  parser.add_argument('--points-step', type=int, default=100, help='points are rounded to a multiple of this to share answers (default 100)')
+  parser.add_argument('--workers', type=int, default=1, help='number of queries to work out at once (default 1)')
+  parser.add_argument('--seed', type=int, help='seed for the random streams')
+  parser.add_argument('--warm-up', action='store_true', help='work out the start of the event for every goal and every 10 dice up to 400 before serving')
+  args = parser.parse_args(argv)
+
+  board = simulate.load_board(args.board) if args.board else simulate.board
+  maps = simulate.load_maps(args.maps) if args.maps else simulate.sims
+  multipliers = simulate.find_maps(maps, [args.label])[0].multipliers
+  service = SuccessRateService(board, multipliers, args.engine, args.cache_size, args.points_step, args.workers, args.seed)
+  if (args.warm_up):
+    start = time.perf_counter()
+    service.warm_up()
+    print(f'Warmed up {len(service.cache):,} states in {time.perf_counter() - start:.1f}s')
+  server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+  print(f'Serving on http://{args.host}:{args.port}/success-rate?goal=20000&dice=60&points=3000&rolls_done=45&tile=4')
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    service.executor.shutdown(cancel_futures=True)
+
+if __name__ == '__main__':
+  main()
@@ -1,24 +1,37 @@
 import random
+import argparse
+import bisect
+import hashlib
+import itertools
 from abc import ABC, abstractmethod
-import statistics
 import math
+import json
+import os
+import shutil
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import OrderedDict
+from collections.abc import MutableMapping
 from enum import Enum
-import pandas
+import numpy
 
 class Stat(Enum):
   POINTS = "Points"
-  ROLLS_DONE = "Rolls Done",
-  INITIAL_DICE = "Initial Dice",
-  EXTRA_DICE = "Extra Dice",
-  GEMS = "Gems",
-  CHROMA = "Chromatic Keys",
-  WISHES = "Wish Coins",
-  SHOVELS = "Rune Shovels",
-  PROMISE = "Promise Shovels",
-  OTTA = "Otta Shards",
-  GOLD = "Gold Coins",
+  ROLLS_DONE = "Rolls Done"
+  INITIAL_DICE = "Initial Dice"
+  EXTRA_DICE = "Extra Dice"
+  GEMS = "Gems"
+  CHROMA = "Chromatic Keys"
+  WISHES = "Wish Coins"
+  SHOVELS = "Rune Shovels"
+  PROMISE = "Promise Shovels"
+  OTTA = "Otta Shards"
+  GOLD = "Gold Coins"
   TILE = "Tile"
 
+# position of each stat in the array that a SimResult keeps its stats in
+stat_index = { stat: i for i, stat in enumerate(Stat) }
+
 class SimulationDetails:
   """Details about the simulation
   """
@@ -29,20 +42,72 @@ class SimulationDetails:
   def __repr__(self):
     return f"{{ Name: {self.label}, Multipliers: {self.multipliers} }}"
 
+class StatsView(MutableMapping):
+  """The stats of a SimResult as a dict keyed by Stat, reading and writing straight through to its array
+  """
+  __slots__ = ('values',)
+
+  def __init__(self, values: list[int]):
+    self.values = values
+
+  def __getitem__(self, stat: Stat):
+    return self.values[stat_index[stat]]
+
+  def __setitem__(self, stat: Stat, value: int):
+    self.values[stat_index[stat]] = value
+
+  def __delitem__(self, stat: Stat):
+    raise TypeError('stats of a result cannot be removed')
+
+  def __iter__(self):
+    return iter(Stat)
+
+  def __len__(self):
+    return len(self.values)
+
+  def __repr__(self):
+    return repr(dict(self))
+
+  def copy(self):
+    """Get the stats as a plain dict
+
+    Returns:
+      dict: The stats
+    """
+    return dict(self)
+
 class SimResult:
-  """Result of a simulation
+  """Result of a simulation. The stats are kept in a list indexed by stat_index and are also available as the .stats mapping.
   """
+  __slots__ = ('values', 'points_bp_met', 'roll_dice_bp_met', 'next_points_bp', 'next_roll_dice_bp')
+
   points_breakpoints = [bp + s for s in [0, 20000, 40000, 60000, 80000] for bp in [2000, 5000, 8000, 12000, 16000, 20000]]
 
   roll_dice_task_breakpoints = [5, 10, 20, 30, 40, 60, 80, 100, 150, 200, 250, 300, 350, 400, 450, 500, 600]
   roll_dice_task_reward = [1, 2, 2, 2, 2, 3, 3, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5]
 
+  # the same breakpoints with no breakpoint left to meet at the end so the next one can always be looked up
+  next_points_breakpoints = points_breakpoints + [math.inf]
+  next_roll_dice_task_breakpoints = roll_dice_task_breakpoints + [math.inf]
+
+  POINTS = stat_index[Stat.POINTS]
+  ROLLS_DONE = stat_index[Stat.ROLLS_DONE]
+  INITIAL_DICE = stat_index[Stat.INITIAL_DICE]
+  EXTRA_DICE = stat_index[Stat.EXTRA_DICE]
+  TILE = stat_index[Stat.TILE]
+
   def __init__(self):
+    self.values = [0] * len(Stat)
     self.points_bp_met = -1
     self.roll_dice_bp_met = -1
-    self.stats = {}
-    for stat in Stat:
-      self.stats[stat] = 0
+    self.next_points_bp = self.points_breakpoints[0]
+    self.next_roll_dice_bp = self.roll_dice_task_breakpoints[0]
+
+  @property
+  def stats(self):
+    """Stats of the result keyed by Stat. Writes go straight to the result.
+    """
+    return StatsView(self.values)
 
   def add_points(self, num_points: int):
     """Add points to the result AND get the number of dice we get back from meeting points breakpoints
@@ -54,17 +119,19 @@ class SimResult:
       return 0
     
     # add points to result
-    self.stats[Stat.POINTS] += num_points
+    values = self.values
+    points = values[self.POINTS] + num_points
+    values[self.POINTS] = points
 
     # check if we met any points breakpoints
-    num_dice = 0
-    for bp in self.points_breakpoints[self.points_bp_met+1:]:
-      if (self.stats[Stat.POINTS] < bp):
-        break
-      self.points_bp_met += 1
-      num_dice += 2
-
-    self.stats[Stat.EXTRA_DICE] += num_dice
+    if (points < self.next_points_bp):
+      return
+    met = self.points_bp_met
+    while (points >= self.next_points_breakpoints[met + 1]):
+      met += 1
+    values[self.EXTRA_DICE] += 2 * (met - self.points_bp_met)
+    self.points_bp_met = met
+    self.next_points_bp = self.next_points_breakpoints[met + 1]
   
   def add_rolls(self, num_rolls: int):
     """Add number of rolls to the result AND get the number of dice we get back from meeting Roll Dice task breakpoints
@@ -76,22 +143,194 @@ class SimResult:
       return 0
 
     # add rolls done to result
-    self.stats[Stat.ROLLS_DONE] += num_rolls
+    values = self.values
+    rolls = values[self.ROLLS_DONE] + num_rolls
+    values[self.ROLLS_DONE] = rolls
 
     # ONLY add to initial dice IF we run out of free dice
-    if (self.stats[Stat.EXTRA_DICE] <= num_rolls):
-      self.stats[Stat.INITIAL_DICE] += num_rolls - self.stats[Stat.EXTRA_DICE]
-    self.stats[Stat.EXTRA_DICE] = max(0, self.stats[Stat.EXTRA_DICE] - num_rolls)
+    extra_dice = values[self.EXTRA_DICE]
+    if (extra_dice <= num_rolls):
+      values[self.INITIAL_DICE] += num_rolls - extra_dice
+      extra_dice = 0
+    else:
+      extra_dice -= num_rolls
 
     # check if we meet any task breakpoints
-    num_dice = 0
-    for bp in self.roll_dice_task_breakpoints[self.roll_dice_bp_met+1:]:
-      if (self.stats[Stat.ROLLS_DONE] < bp):
-        break
-      self.roll_dice_bp_met += 1
-      num_dice += self.roll_dice_task_reward[self.roll_dice_bp_met]
+    if (rolls >= self.next_roll_dice_bp):
+      met = self.roll_dice_bp_met
+      while (rolls >= self.next_roll_dice_task_breakpoints[met + 1]):
+        met += 1
+        extra_dice += self.roll_dice_task_reward[met]
+      self.roll_dice_bp_met = met
+      self.next_roll_dice_bp = self.next_roll_dice_task_breakpoints[met + 1]
+    values[self.EXTRA_DICE] = extra_dice
+
+  def fork(self):
+    """Get a copy of the result that can carry on separately from this one
+
+    Returns:
+      SimResult: The copy
+    """
+    result = SimResult.__new__(SimResult)
+    result.values = self.values.copy()
+    result.points_bp_met = self.points_bp_met
+    result.roll_dice_bp_met = self.roll_dice_bp_met
+    result.next_points_bp = self.next_points_bp
+    result.next_roll_dice_bp = self.next_roll_dice_bp
+    return result
+
+class BatchSimResult:
+  """Results of many simulation runs that are advanced together. Every stat is a numpy array with one entry per run.
+  """
+  points_breakpoints = numpy.array(SimResult.points_breakpoints)
+
+  roll_dice_task_breakpoints = numpy.array(SimResult.roll_dice_task_breakpoints)
+  # total dice rewarded once a roll dice breakpoint is met, shifted by one so index 0 means no breakpoint met
+  roll_dice_task_cum_reward = numpy.concatenate(([0], numpy.cumsum(SimResult.roll_dice_task_reward)))
+
+  # control variates tracked per run when asked for, see CompiledBoard.batch_roll
+  control_variate_names = ['spin points', 'roll points', 'dice']
+
+  def __init__(self, num_runs: int, prev_run: SimResult = None, control_variates: bool = False):
+    """Create the results for a batch of runs
+
+    Args:
+      num_runs (int): Number of runs in the batch
+      prev_run (SimResult | BatchSimResult, optional): Previous run that every run in the batch starts from, or previous batch that each run continues from. Defaults to None.
+      control_variates (bool, optional): Whether to track control variates of every run. Always tracked if the previous batch tracks them. Defaults to False.
+    """
+    self.num_runs = num_runs
+    self.points_bp_met = numpy.full(num_runs, prev_run.points_bp_met if prev_run else -1, dtype=numpy.int64)
+    self.roll_dice_bp_met = numpy.full(num_runs, prev_run.roll_dice_bp_met if prev_run else -1, dtype=numpy.int64)
+    self.stats = {}
+    for stat in Stat:
+      self.stats[stat] = numpy.full(num_runs, prev_run.stats[stat] if prev_run else 0, dtype=numpy.int64)
+    self.control_variates = None
+    if (getattr(prev_run, 'control_variates', None) is not None):
+      self.control_variates = prev_run.control_variates.copy()
+    elif (control_variates):
+      self.control_variates = numpy.zeros((num_runs, len(self.control_variate_names)))
+
+  def fork(self):
+    """Get a copy of every run that can carry on separately from this batch
+
+    Returns:
+      BatchSimResult: The copy
+    """
+    return BatchSimResult(self.num_runs, self)
+
+  def add_points(self, rows: numpy.ndarray, num_points: numpy.ndarray):
+    """Add points to the selected runs AND give them the dice from meeting points breakpoints
+
+    Args:
+      rows (numpy.ndarray): Indices of the runs to add to
+      num_points (numpy.ndarray): Number of points to add to each run
+    """
+    points = self.stats[Stat.POINTS][rows] + num_points
+    self.stats[Stat.POINTS][rows] = points
+
+    # check if we met any points breakpoints
+    old_met = self.points_bp_met[rows]
+    met = numpy.maximum(numpy.searchsorted(self.points_breakpoints, points, side='right') - 1, old_met)
+    self.points_bp_met[rows] = met
+    self.stats[Stat.EXTRA_DICE][rows] += 2 * (met - old_met)
+
+  def add_rolls(self, rows: numpy.ndarray, num_rolls: numpy.ndarray):
+    """Add number of rolls to the selected runs AND give them the dice from meeting Roll Dice task breakpoints
+
+    Args:
+      rows (numpy.ndarray): Indices of the runs to add to
+      num_rolls (numpy.ndarray): Number of rolls to add to each run
+    """
+    rolls = self.stats[Stat.ROLLS_DONE][rows] + num_rolls
+    self.stats[Stat.ROLLS_DONE][rows] = rolls
+
+    # ONLY add to initial dice IF we run out of free dice
+    extra_dice = self.stats[Stat.EXTRA_DICE][rows]
+    self.stats[Stat.INITIAL_DICE][rows] += numpy.maximum(num_rolls - extra_dice, 0)
+    extra_dice = numpy.maximum(extra_dice - num_rolls, 0)
+
+    # check if we meet any task breakpoints
+    old_met = self.roll_dice_bp_met[rows]
+    met = numpy.maximum(numpy.searchsorted(self.roll_dice_task_breakpoints, rolls, side='right') - 1, old_met)
+    self.roll_dice_bp_met[rows] = met
+    self.stats[Stat.EXTRA_DICE][rows] = extra_dice + self.roll_dice_task_cum_reward[met + 1] - self.roll_dice_task_cum_reward[old_met + 1]
+
+class RandomTape:
+  """Random numbers for a batch of runs drawn ahead of time, where every run has its own sequence of dice rolls and tile spins.
+  Replaying the same tape for different multiplier maps gives each run the same rolls no matter when other runs stop,
+  so comparing maps needs a lot fewer runs (common random numbers).
+
+  With antithetic set, the second half of the runs mirror the first half: run i + half rolls 7 - each die and spins 1 - the
+  spin of run i, so a lucky run is paired with an unlucky one. With stratified set, the spins of every step are spread evenly
+  over [0, 1) across the runs instead of being drawn independently.
+  """
+  def __init__(self, num_runs: int, seed: int = None, length: int = 256, antithetic: bool = False, stratified: bool = False):
+    """Draw a tape
+
+    Args:
+      num_runs (int): Number of runs in the batch
+      seed (int, optional): Seed of the tape. Defaults to None.
+      length (int, optional): Number of rolls to draw for each run up front. The tape doubles in length whenever a run gets to the end of it. Defaults to 256.
+      antithetic (bool, optional): Whether to pair run i with run i + (num_runs + 1) // 2, which gets the opposite rolls and spins. Defaults to False.
+      stratified (bool, optional): Whether to stratify the spins of every step across the runs. Defaults to False.
+    """
+    self.rng = numpy.random.default_rng(seed)
+    self.antithetic = antithetic
+    self.stratified = stratified
+    self.rolls = numpy.empty((num_runs, 0), dtype=numpy.int8)
+    self.spins = numpy.empty((num_runs, 0))
+    self.extend(length)
+    self.position = numpy.zeros(num_runs, dtype=numpy.int64)
 
-    self.stats[Stat.EXTRA_DICE] += num_dice
+  def extend(self, length: int):
+    """Draw more rolls for every run
+
+    Args:
+      length (int): Number of rolls to add
+    """
+    num_runs = len(self.rolls)
+    if (not self.antithetic and not self.stratified):
+      rolls = self.rng.integers(1, 7, size=(num_runs, length)) + self.rng.integers(1, 7, size=(num_runs, length))
+      spins = self.rng.random((num_runs, length))
+    else:
+      # runs that draw their own numbers. With antithetic the rest mirror them.
+      num_drawn = (num_runs + 1) // 2 if self.antithetic else num_runs
+      dice = self.rng.integers(1, 7, size=(2, num_drawn, length))
+      if (self.stratified):
+        # one random permutation of the strata per step, then a random point within each stratum
+        strata = numpy.argsort(self.rng.random((num_drawn, length)), axis=0)
+        spins = (strata + self.rng.random((num_drawn, length))) / num_drawn
+      else:
+        spins = self.rng.random((num_drawn, length))
+      if (self.antithetic):
+        num_mirrored = num_runs - num_drawn
+        dice = numpy.concatenate((dice, 7 - dice[:, :num_mirrored]), axis=1)
+        # 1 - spin can be exactly 1 which no reward covers
+        spins = numpy.concatenate((spins, numpy.minimum(1 - spins[:num_mirrored], numpy.nextafter(1, 0))))
+      rolls = dice[0] + dice[1]
+    self.rolls = numpy.concatenate((self.rolls, rolls.astype(numpy.int8)), axis=1)
+    self.spins = numpy.concatenate((self.spins, spins), axis=1)
+
+  def rewind(self):
+    """Go back to the start of the tape for every run
+    """
+    self.position[:] = 0
+
+  def draw(self, rows: numpy.ndarray):
+    """Get the next dice roll and spin of the selected runs
+
+    Args:
+      rows (numpy.ndarray): Indices of the runs that are rolling
+
+    Returns:
+      tuple[numpy.ndarray, numpy.ndarray]: Sum of the two dice, number between 0 and 1 to pick the tile reward with
+    """
+    position = self.position[rows]
+    if (len(position) > 0 and position.max() >= self.rolls.shape[1]):
+      self.extend(self.rolls.shape[1])
+    self.position[rows] = position + 1
+    return self.rolls[rows, position].astype(numpy.int64), self.spins[rows, position]
 
 class Tile(ABC):
   """
@@ -120,6 +359,15 @@ class Tile(ABC):
     """    
     pass
 
+  @abstractmethod
+  def get_outcomes(self):
+    """Get every reward that landing on this tile can give with no applied multiplier
+
+    Returns:
+      list[tuple[float, dict[Stat, int]]]: Probability of each reward, Amount of each stat the reward gives
+    """
+    pass
+
   @abstractmethod
   def get_value(self):
     """Get the value of this tile in terms of points AND dice
@@ -149,45 +397,63 @@ class FlatTile(Tile):
 
     result.stats[Stat.EXTRA_DICE] += (self.dice * multiplier)
 
+  def get_outcomes(self):
+    return [(1, { Stat.POINTS: self.points, Stat.GEMS: self.gems, Stat.EXTRA_DICE: self.dice })]
+
   def get_value(self):
     return self.points, self.dice
 
 class GrandPrizeTile(Tile):
+  prizes = [
+    { 'prize': Stat.CHROMA, 'amount': 2},
+    { 'prize': Stat.WISHES, 'amount': 1},
+    { 'prize': Stat.GEMS, 'amount': 100},
+    { 'prize': Stat.PROMISE, 'amount': 1},
+    { 'prize': Stat.EXTRA_DICE, 'amount': 2},
+    { 'prize': Stat.EXTRA_DICE, 'amount': 1},
+  ]
+  prize_weights = [
+    666,
+    2666,
+    2666,
+    666,
+    666,
+    2666
+  ]
+
   def get_reward(self, multiplier: int, result: SimResult):
-    prizes = [
-      { 'prize': Stat.CHROMA, 'amount': 2},
-      { 'prize': Stat.WISHES, 'amount': 1},
-      { 'prize': Stat.GEMS, 'amount': 100},
-      { 'prize': Stat.PROMISE, 'amount': 1},
-      { 'prize': Stat.EXTRA_DICE, 'amount': 2},
-      { 'prize': Stat.EXTRA_DICE, 'amount': 1},
-    ]
-    prize_weights = [
-      666,
-      2666,
-      2666,
-      666,
-      666,
-      2666
-    ]
-    spins = random.choices(prizes, weights=prize_weights)
+    spins = random.choices(self.prizes, weights=self.prize_weights)
     spin = spins[0]
     result.stats[spin['prize']] += (spin['amount'] * multiplier)
+
+  def get_outcomes(self):
+    total_weight = sum(self.prize_weights)
+    return [(weight / total_weight, { spin['prize']: spin['amount'] }) for spin, weight in zip(self.prizes, self.prize_weights)]
   
   def get_value(self):
     return 0, (666 * 2 + 2666 * 1) / 10000
 
 class PointWheelTile(Tile):
+  points = [100, 200, 500, 1000]
+  points_weights = [3478,3478, 2608, 434]
+  multipliers = [1, 3, 5]
+  multipliers_weights = [6153, 3076, 769]
+
   def get_reward(self, multiplier: int, result: SimResult):
-    points = [100, 200, 500, 1000]
-    points_weights = [3478,3478, 2608, 434]
-    spins = random.choices(points, weights=points_weights)
+    spins = random.choices(self.points, weights=self.points_weights)
     spin = spins[0]
-    multipliers = [1, 3, 5]
-    multipliers_weights = [6153, 3076, 769]
-    spins2 = random.choices(multipliers, weights=multipliers_weights)
+    spins2 = random.choices(self.multipliers, weights=self.multipliers_weights)
     spin2 = spins2[0]
     result.add_points(spin * spin2 * multiplier)
+
+  def get_outcomes(self):
+    points_total_weight = sum(self.points_weights)
+    multipliers_total_weight = sum(self.multipliers_weights)
+    return [
+      (points_weight / points_total_weight * multiplier_weight / multipliers_total_weight, { Stat.POINTS: points * multiplier })
+      for points, points_weight in zip(self.points, self.points_weights)
+      for multiplier, multiplier_weight in zip(self.multipliers, self.multipliers_weights)
+    ]
   
   def get_value(self):
     # spin points
@@ -197,313 +463,2449 @@ class PointWheelTile(Tile):
     return point_value, 0
 
 class FateWheelTile(Tile):
+  prizes = [
+    { 'prize': Stat.POINTS, 'amount': 500},
+    { 'prize': Stat.OTTA, 'amount': 2},
+    { 'prize': Stat.WISHES, 'amount': 1},
+    { 'prize': Stat.EXTRA_DICE, 'amount': 1},
+    { 'prize': Stat.GOLD, 'amount': 2000},
+  ]
+  prize_weights = [
+    2500,
+    300,
+    700,
+    1500,
+    5000,
+  ]
+
   def get_reward(self, multiplier: int, result: SimResult):
-    prizes = [
-      { 'prize': Stat.POINTS, 'amount': 500},
-      { 'prize': Stat.OTTA, 'amount': 2},
-      { 'prize': Stat.WISHES, 'amount': 1},
-      { 'prize': Stat.EXTRA_DICE, 'amount': 1},
-      { 'prize': Stat.GOLD, 'amount': 2000},
-    ]
-    prize_weights = [
-      2500,
-      300,
-      700,
-      1500,
-      5000,
-    ]
-    spins = random.choices(prizes, weights=prize_weights)
+    spins = random.choices(self.prizes, weights=self.prize_weights)
     spin = spins[0]
     if (spin['prize'] == Stat.POINTS):
       result.add_points(spin['amount'] * multiplier)
     else:
       result.stats[spin['prize']] += (spin['amount'] * multiplier)
+
+  def get_outcomes(self):
+    total_weight = sum(self.prize_weights)
+    return [(weight / total_weight, { spin['prize']: spin['amount'] }) for spin, weight in zip(self.prizes, self.prize_weights)]
   
   def get_value(self):
     return (500 * 2500) / 10000, (1500 * 1) / 10000
 
-def calc_best_multipliers(board: list[Tile], multiplier: int):
-  """Calculate the best multipliers for the board
-
-  Args:
-    board (list[Tile]): The board
-    multiplier (int): The multiplier to set around the board
+# Number of ways to roll each sum of two dice, starting at a sum of 2
+roll_sum_ways = [1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1]
 
-  Returns:
-    list[int]: The best multipliers to apply when rolling from each tile of the board
+class CompiledBoard:
+  """A board turned into flat tables once so rolling doesn't need to go through every Tile object on every roll.
+  Every engine works off of these tables.
   """
-  tile_values: list[tuple[float,float]] = [tile.get_value() for tile in board]
-  #dice value = average points gained per die / (1 - average die gained per die)
-  dice_value = statistics.fmean([v[0] for v in tile_values]) / (1 - statistics.fmean([v[1] for v in tile_values]))
-  # calculated value of tiles in terms of points with NO APPLIED MULTIPLIERS
-  tile_calc_values = [v[0] + v[1]*dice_value for v in tile_values]
-  # get the total point value of each tile based on what tiles can be reached from it
-  def get_values(index: int, num_hits: int):
-    points = tile_values[index][0] * num_hits / 36
-    dice = tile_values[index][1] * num_hits / 36
-    value = tile_calc_values[index] * num_hits / 36
-    return points, dice, value
-  tile_mult_value: list[tuple[float, float, float]] = []
-  for i in range(len(tile_calc_values)):
-    total_points = 0
-    total_dice = 0
-    total_value = 0
-    # 2 → 1 way: (1+1)
-    points, dice, value = get_values((i + 2) % 24, 1)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 3 → 2 ways: (1+2, 2+1)
-    points, dice, value = get_values((i + 3) % 24, 2)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 4 → 3 ways: (1+3, 2+2, 3+1)
-    points, dice, value = get_values((i + 4) % 24, 3)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 5 → 4 ways: (1+4, 2+3, 3+2, 4+1)
-    points, dice, value = get_values((i + 5) % 24, 4)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 6 → 5 ways: (1+5, 2+4, 3+3, 4+2, 5+1)
-    points, dice, value = get_values((i + 6) % 24, 5)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 7 → 6 ways: (1+6, 2+5, 3+4, 4+3, 5+2, 6+1)
-    points, dice, value = get_values((i + 7) % 24, 6)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 8 → 5 ways: (2+6, 3+5, 4+4, 5+3, 6+2)
-    points, dice, value = get_values((i + 8) % 24, 5)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 9 → 4 ways: (3+6, 4+5, 5+4, 6+3)
-    points, dice, value = get_values((i + 9) % 24, 4)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 10 → 3 ways: (4+6, 5+5, 6+4)
-    points, dice, value = get_values((i + 10) % 24, 3)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 11 → 2 ways: (5+6, 6+5)
-    points, dice, value = get_values((i + 11) % 24, 2)
-    total_points += points
-    total_dice += dice
-    total_value += value
-    # 12 → 1 way: (6+6)
-    points, dice, value = get_values((i + 12) % 24, 1)
-    total_points += points
-    total_dice += dice
-    total_value += value
-
-    tile_mult_value.append(tuple([total_points, total_dice, total_value]))
-
-  # sort the indices of the tile_mult_value such that the values are in descending order
-  sorted_index = sorted(range(len(tile_mult_value)), key=lambda i: tile_mult_value[i][2], reverse=True)
-
-  best_multiplier = [1] * 24
-  best_ppd = sum([best_multiplier[i] * tile_mult_value[i][2] for i in range(len(best_multiplier))]) / sum(best_multiplier)
-  for i in range(len(sorted_index)):
-    best_multiplier[sorted_index[i]] = multiplier
+  def __init__(self, board: list[Tile]):
+    """Compile a board
 
-    # Average Projected Dice Value = Sum(PDVxM) / Sum(Tile Multipliers)
-    avg_num_dice = sum([best_multiplier[j] * tile_mult_value[j][1] for j in range(len(best_multiplier))]) / sum(best_multiplier)
-    # PPID = Sum(Project Points Value of Tile * Tile Multiplier) / Sum(Tile Multipliers) / (1 - Average Projected Dice Value)
-    ppd = sum([best_multiplier[j] * tile_mult_value[j][0] for j in range(len(best_multiplier))]) / sum(best_multiplier) / (1 - avg_num_dice)
-    if (ppd < best_ppd):
-      best_multiplier[sorted_index[i]] = 1
-      break
-    best_ppd = ppd
-  return best_multiplier
+    Args:
+      board (list[Tile]): The board
+    """
+    self.board = board
+    self.num_tiles = len(board)
+    self.tile_types = [type(tile).__name__ for tile in board]
+    self.fingerprint = board_fingerprint(board)
+    # short version of the fingerprint that can be saved to a file
+    self.fingerprint_hash = hashlib.sha256(repr(self.fingerprint).encode()).hexdigest()
+    # every (tile we roll from, chance, tile we land on, points, dice) with no applied multiplier, worked out the first time moves are asked for
+    self.move_entries = None
+    # tile we land on when rolling each sum of two dice from each tile
+    self.landing = (numpy.arange(self.num_tiles)[:, None] + numpy.arange(2, 13)[None, :]) % self.num_tiles
+    self.roll_probabilities = numpy.array(roll_sum_ways) / 36
+    # expected points and dice of each tile with no applied multipliers
+    self.tile_values = numpy.array([tile.get_value() for tile in board], dtype=float)
 
-def output_stats(df: pandas.DataFrame):
-  avg_stats = df.mean()
-  print(f"PPID: {avg_stats[Stat.POINTS] / (avg_stats[Stat.INITIAL_DICE] - avg_stats[Stat.EXTRA_DICE])}")
-  print(f"PPR: {avg_stats[Stat.POINTS] / avg_stats[Stat.ROLLS_DONE]}")
-  print(avg_stats)
+    # every reward of each tile with no applied multipliers, padded to the tile with the most rewards
+    outcomes = [tile.get_outcomes() for tile in board]
+    max_outcomes = max(len(tile_outcomes) for tile_outcomes in outcomes)
+    self.outcome_probabilities = numpy.zeros((self.num_tiles, max_outcomes))
+    self.outcome_stats = numpy.zeros((self.num_tiles, max_outcomes, len(Stat)), dtype=numpy.int64)
+    for tile, tile_outcomes in enumerate(outcomes):
+      for i, (probability, reward) in enumerate(tile_outcomes):
+        self.outcome_probabilities[tile, i] = probability
+        for stat, amount in reward.items():
+          self.outcome_stats[tile, i, stat_index[stat]] += amount
+    # cumulative chance of each reward to pick one with a single uniform number. Padded rewards can never be picked.
+    self.outcome_cum_probabilities = numpy.cumsum(self.outcome_probabilities, axis=1)
+    self.outcome_cum_probabilities /= self.outcome_cum_probabilities[:, -1:]
+    self.outcome_cum_probabilities[self.outcome_probabilities == 0] = 2
+    # expected reward of each tile, and of the tile we land on from each tile, with no applied multipliers
+    self.outcome_means = (self.outcome_probabilities[:, :, None] * self.outcome_stats).sum(axis=1)
+    self.next_outcome_means = (self.roll_probabilities[None, :, None] * self.outcome_means[self.landing]).sum(axis=1)
+    # stats other than points that any reward gives, since points have to go through add_points
+    self.reward_stats = [stat for stat in Stat if stat != Stat.POINTS and self.outcome_stats[:, :, stat_index[stat]].any()]
+    self.points_column = stat_index[Stat.POINTS]
+    self.reward_columns = [stat_index[stat] for stat in self.reward_stats]
 
-def simulate_single_run(board: list[Tile], multipliers: list[int], num_dice_rolls: int, points_to_meet: int, prev_run: SimResult = None, skip_next_bp: bool = False):
-  """Simulate going around the board starting with a specified number of dice rolls
+    # the same tables as python lists for the scalar engine where indexing numpy arrays is slow
+    self.scalar_landing = self.landing.tolist()
+    self.scalar_cum_probabilities = [[p for p in row if p <= 1] for row in self.outcome_cum_probabilities.tolist()]
+    self.scalar_rewards = [
+      [(int(reward[self.points_column]), [(column, int(reward[column])) for column in self.reward_columns if reward[column]]) for reward in tile_rewards[:len(cum)]]
+      for tile_rewards, cum in zip(self.outcome_stats, self.scalar_cum_probabilities)
+    ]
+
+  def get_points_dice_outcomes(self, tile: int):
+    """Get the chance of each distinct (points, dice) reward of a tile with no applied multipliers
+
+    Args:
+      tile (int): The tile
+
+    Returns:
+      list[tuple[float, int, int]]: Chance, Points, Dice
+    """
+    outcomes = {}
+    for probability, reward in zip(self.outcome_probabilities[tile], self.outcome_stats[tile]):
+      if (probability > 0):
+        key = (int(reward[self.points_column]), int(reward[stat_index[Stat.EXTRA_DICE]]))
+        outcomes[key] = outcomes.get(key, 0) + probability
+    return [(probability, points, dice) for (points, dice), probability in outcomes.items()]
+
+  def get_moves(self, multiplier: int, points_step: int):
+    """Get every move a roll can make when points are tracked in buckets, for working out chances instead of simulating
+
+    Args:
+      multiplier (int): The multiplier applied to the roll
+      points_step (int): Size of the points buckets. A reward that isn't a multiple of it is split between the two closest buckets so the expected points stay the same.
+
+    Returns:
+      tuple[numpy.ndarray, numpy.ndarray]: (tile we roll from, buckets moved up, change in dice, tile we land on) of every move, chance of each move
+    """
+    if (self.move_entries is None):
+      tile_outcomes = [self.get_points_dice_outcomes(tile) for tile in range(self.num_tiles)]
+      entries = []
+      for tile in range(self.num_tiles):
+        for new_tile, roll_probability in zip(self.landing[tile], self.roll_probabilities):
+          for probability, points, extra_dice in tile_outcomes[new_tile]:
+            entries.append((tile, roll_probability * probability, new_tile, points, extra_dice))
+      self.move_entries = tuple(numpy.array(column) for column in zip(*entries))
+    from_tile, chance, new_tile, points, extra_dice = self.move_entries
+    bucket_shift, remainder = numpy.divmod(points * multiplier, points_step)
+    share = numpy.concatenate([1 - remainder / points_step, remainder / points_step])
+    moves = numpy.stack([numpy.tile(from_tile, 2), numpy.concatenate([bucket_shift, bucket_shift + 1]), numpy.tile(extra_dice * multiplier - multiplier, 2), numpy.tile(new_tile, 2)], axis=1)
+    keep = share > 0
+    return moves[keep], (numpy.tile(chance, 2) * share)[keep]
+
+  def get_points_dice(self, num_buckets: int, points_step: int, max_multiplier: int):
+    """Get the dice rewarded from points breakpoints for each points bucket, including the buckets past the goal a roll can reach
+
+    Args:
+      num_buckets (int): Number of points buckets below the goal
+      points_step (int): Size of the points buckets
+      max_multiplier (int): Largest multiplier a roll can have
+
+    Returns:
+      numpy.ndarray: Total dice rewarded from points breakpoints for each bucket
+    """
+    max_reward = self.outcome_stats[:, :, self.points_column].max()
+    bucket_points = numpy.arange(num_buckets + max_reward * max_multiplier // points_step + 2) * points_step
+    return 2 * numpy.searchsorted(SimResult.points_breakpoints, bucket_points, side='right')
+
+  def roll(self, multiplier: int, result: SimResult):
+    """Do a dice roll for a single run, move it and give it the reward of the tile it lands on
+
+    Args:
+      multiplier (int): The multiplier applied to this roll
+      result (SimResult): The cumulative result of the simulation run that we will add to
+
+    Returns:
+      int: The sum of the two dice
+    """
+    result.add_rolls(multiplier)
+    roll = random.randint(1, 6) + random.randint(1, 6)
+    values = result.values
+    tile = self.scalar_landing[values[SimResult.TILE]][roll - 2]
+    values[SimResult.TILE] = tile
+
+    # land on new tile and get the reward
+    points, rewards = self.scalar_rewards[tile][bisect.bisect_right(self.scalar_cum_probabilities[tile], random.random())]
+    if (points):
+      result.add_points(points * multiplier)
+    for column, amount in rewards:
+      values[column] += amount * multiplier
+    return roll
+
+  def instrumented_roll(self, multiplier: int, result: SimResult, instrumentation: 'Instrumentation'):
+    """Same as roll, drawing the same random numbers, but timing the random number generation and the accumulation of the reward separately
+
+    Args:
+      multiplier (int): The multiplier applied to this roll
+      result (SimResult): The cumulative result of the simulation run that we will add to
+      instrumentation (Instrumentation): Where to add the counts and times to
+
+    Returns:
+      int: The sum of the two dice
+    """
+    points_bp_met, roll_dice_bp_met = result.points_bp_met, result.roll_dice_bp_met
+    start = time.perf_counter_ns()
+    roll = random.randint(1, 6) + random.randint(1, 6)
+    rolled = time.perf_counter_ns()
+    result.add_rolls(multiplier)
+    values = result.values
+    tile = self.scalar_landing[values[SimResult.TILE]][roll - 2]
+    values[SimResult.TILE] = tile
+    moved = time.perf_counter_ns()
+    spin = random.random()
+    spun = time.perf_counter_ns()
+
+    # land on new tile and get the reward
+    points, rewards = self.scalar_rewards[tile][bisect.bisect_right(self.scalar_cum_probabilities[tile], spin)]
+    if (points):
+      result.add_points(points * multiplier)
+    for column, amount in rewards:
+      values[column] += amount * multiplier
+    end = time.perf_counter_ns()
+
+    instrumentation.rng_ns += (rolled - start) + (spun - moved)
+    instrumentation.accumulation_ns += (moved - rolled) + (end - spun)
+    tile_type = self.tile_types[tile]
+    instrumentation.tile_landings[tile_type] = instrumentation.tile_landings.get(tile_type, 0) + 1
+    instrumentation.tile_ns[tile_type] = instrumentation.tile_ns.get(tile_type, 0) + end - start
+    instrumentation.points_bp_hits += result.points_bp_met - points_bp_met
+    instrumentation.roll_dice_bp_hits += result.roll_dice_bp_met - roll_dice_bp_met
+    return roll
+
+  def batch_roll(self, result: BatchSimResult, rows: numpy.ndarray, multipliers: numpy.ndarray, rng: numpy.random.Generator):
+    """Do a dice roll for every selected run in a batch, move them and give them the reward of the tile they land on
+
+    Args:
+      result (BatchSimResult): The cumulative results of the batch that we will add to
+      rows (numpy.ndarray): Indices of the runs that are rolling
+      multipliers (numpy.ndarray): The multiplier each run is applying to this roll
+      rng (numpy.random.Generator | RandomTape): Random number generator to roll dice with, or a tape to read the rolls from
+
+    Returns:
+      numpy.ndarray: The sum of the two dice of each run
+    """
+    result.add_rolls(rows, multipliers)
+    if (isinstance(rng, RandomTape)):
+      roll, spin = rng.draw(rows)
+    else:
+      roll = rng.integers(1, 7, size=len(rows)) + rng.integers(1, 7, size=len(rows))
+      spin = rng.random(len(rows))
+    from_tiles = result.stats[Stat.TILE][rows]
+    tiles = self.landing[from_tiles, roll - 2]
+    result.stats[Stat.TILE][rows] = tiles
+
+    # land on new tile and get the reward
+    spins = (spin[:, None] >= self.outcome_cum_probabilities[tiles]).sum(axis=1)
+    rewards = self.outcome_stats[tiles, spins]
+    result.add_points(rows, rewards[:, self.points_column] * multipliers)
+    for stat, column in zip(self.reward_stats, self.reward_columns):
+      result.stats[stat][rows] += rewards[:, column] * multipliers
+    if (result.control_variates is not None):
+      # luck of the spin and of the roll compared to their expected value. Each has an expected value of 0 whatever came before.
+      dice_column = stat_index[Stat.EXTRA_DICE]
+      result.control_variates[rows] += multipliers[:, None] * numpy.column_stack((
+        rewards[:, self.points_column] - self.outcome_means[tiles, self.points_column],
+        self.outcome_means[tiles, self.points_column] - self.next_outcome_means[from_tiles, self.points_column],
+        rewards[:, dice_column] - self.next_outcome_means[from_tiles, dice_column],
+      ))
+    return roll
+
+def board_fingerprint(board: list[Tile]):
+  """Get what a board is made of, so copies of a board (e.g. one sent to another process) can be told apart from a different board
 
   Args:
     board (list[Tile]): The board
-    multipliers (list[int]): The multipliers to apply when rolling from each tile
-    num_dice_rolls (int): Number of dice to start with. The sim will stop if all of these dice are used.
-    points_to_meet (int): Number of points to aim for. The sim will stop if we reach this threshold even if we didn't use all starting dice.
-    prev_run (SimResult): Previous run that we want to add to.
-  
+
   Returns:
-    SimResult: Result of simulation
+    tuple: Type of every tile along with the chance and stats of each of its rewards
   """
-  result = prev_run if prev_run else SimResult() 
-  while (result.stats[Stat.POINTS] < points_to_meet and (num_dice_rolls - result.stats[Stat.INITIAL_DICE] + result.stats[Stat.EXTRA_DICE] > 0)) :
-    # get multiplier then check if it's allowed
-    num_turns = num_dice_rolls - result.stats[Stat.INITIAL_DICE] + result.stats[Stat.EXTRA_DICE]
-    multiplier = multipliers[result.stats[Stat.TILE]]
-    if (num_turns < 20):
-      multiplier = min(1, multiplier)
-    elif (num_turns < 30):
-      multiplier = min(2, multiplier)
-    elif (num_turns < 50):
-      multiplier = min(3, multiplier)
-    elif (num_turns < 100):
-      multiplier = min(5, multiplier)
-
-    # roll the dice
-    old_tile = board[result.stats[Stat.TILE]]
-    roll = old_tile.roll(multiplier, result)
+  return tuple(
+    (type(tile).__name__, tuple((probability, tuple(sorted((stat.name, amount) for stat, amount in reward.items()))) for probability, reward in tile.get_outcomes()))
+    for tile in board
+  )
 
-    # land on new tile and get the reward
-    result.stats[Stat.TILE] = (result.stats[Stat.TILE] + roll) % 24
-    tile = board[result.stats[Stat.TILE]]
-    tile.get_reward(multiplier, result)
-
-  if (not skip_next_bp and result.roll_dice_bp_met < len(result.roll_dice_task_breakpoints) - 1): # We haven't hit every roll dice breakpoint
-    next_dice_bp = result.roll_dice_task_breakpoints[result.roll_dice_bp_met+1]
-    next_dice_bp_reward = result.roll_dice_task_reward[result.roll_dice_bp_met+1]
-    if next_dice_bp - result.stats[Stat.ROLLS_DONE] < next_dice_bp_reward:
-      difference = next_dice_bp - result.stats[Stat.ROLLS_DONE]
-      while (difference > 0 and (result.stats[Stat.INITIAL_DICE] < num_dice_rolls or result.stats[Stat.EXTRA_DICE] > 0)):
-        # get multiplier then check if it's allowed
-        num_turns = num_dice_rolls - result.stats[Stat.INITIAL_DICE] + result.stats[Stat.EXTRA_DICE]
-        multiplier = multipliers[result.stats[Stat.TILE]]
-        if (num_turns < 20 or difference < 2):
-          multiplier = min(1, multiplier)
-        elif (num_turns < 30 or difference < 3):
-          multiplier = min(2, multiplier)
-        elif (num_turns < 50 or difference < 4):
-          multiplier = min(3, multiplier)
-        elif (num_turns < 100 or difference < 6):
-          multiplier = min(5, multiplier)
-
-        # roll the dice
-        old_tile = board[result.stats[Stat.TILE]]
-        roll = old_tile.roll(multiplier, result)
-
-        # land on new tile and get the reward
-        result.stats[Stat.TILE] = (result.stats[Stat.TILE] + roll) % 24
-        tile = board[result.stats[Stat.TILE]]
-        tile.get_reward(multiplier, result)
-        difference = next_dice_bp - result.stats[Stat.ROLLS_DONE]
-  
-  return result
+# Boards that have already been compiled, by what they are made of. Only the most recently used few are kept since boards
+# can come from files or requests.
+compiled_boards: OrderedDict[tuple, CompiledBoard] = OrderedDict()
+max_compiled_boards = 8
+# the tiles of the last board we were asked for and its compiled version. Going through the rewards of every tile is too slow
+# to do on every run, so asking for the same tiles again skips it.
+last_compiled_board: tuple[tuple, CompiledBoard] = ((), None)
 
-def add_round_to_dataset(dataset, stats):
-  """Add a simulation round stats to the dataset that will later be transformed into a pandas DataFrame
+def compile_board(board: list[Tile]):
+  """Get the compiled version of a board, compiling it the first time we see it
 
   Args:
-      dataset (dict): dataset to add to
-      stats (dict): simulation stats to add
+    board (list[Tile] | CompiledBoard): The board
+
+  Returns:
+    CompiledBoard: The compiled board
   """
-  for s in Stat:
-    if (s in dataset):
-      dataset[s].append(stats[s])
-    else:
-      dataset[s] = [stats[s]]
+  global last_compiled_board
+  if (isinstance(board, CompiledBoard)):
+    return board
+  tiles = tuple(board)
+  if (tiles != last_compiled_board[0] or last_compiled_board[1] is None):
+    key = board_fingerprint(board)
+    if (key not in compiled_boards):
+      compiled_boards[key] = CompiledBoard(board)
+    compiled_boards.move_to_end(key)
+    while (len(compiled_boards) > max_compiled_boards):
+      compiled_boards.popitem(last=False)
+    last_compiled_board = (tiles, compiled_boards[key])
+  return last_compiled_board[1]
+
+def expected_reachable_values(tile_values: numpy.ndarray):
+  """Get the expected value of the tile we land on when rolling from every tile. This is a circulant convolution of the
+  tile values with the chance of every 2d6 sum, so it works for a board of any size.
 
-def add_stats_to_round(stats1, stats2):
-  """Add up stats across multipler rounds
-  
   Args:
-      stats1 (dict): simulation stats to add
-      stats2 (dict): simulation stats to add
-  
+    tile_values (numpy.ndarray): Values of every tile, with tiles on the second last axis
+
+  Returns:
+    numpy.ndarray: Expected value of the tile we land on from every tile, same shape as tile_values
   """
-  cum_stats = {}
-  for stat in Stat:
-    num1 = stats1[stat] if stat in stats1 else 0
-    num2 = stats2[stat] if stat in stats2 else 0
-    if stat == Stat.TILE:
-      cum_stats[stat] = num2
-      continue
-    cum_stats[stat] = num1 + num2
-  return cum_stats
-    
+  expected = numpy.zeros_like(tile_values, dtype=float)
+  for roll, ways in enumerate(roll_sum_ways, start=2):
+    expected += ways / 36 * numpy.roll(tile_values, -roll, axis=-2)
+  return expected
 
-def simulation(sim_details: list[SimulationDetails], board: list[Tile], num_rounds: int, num_dices: list[int], points_to_meet: int, csv: bool = False):
-  """Run simulations to get the average PPID using a specified number of starting dice. A single run will only end after all starting dice and free dice received in the run are used.
+def calc_best_multipliers_batch(boards: list, multipliers: list[int] = [2, 3, 5, 10]):
+  """Calculate the best multipliers for many boards and multipliers at once. Boards of different sizes are grouped by size.
 
   Args:
-    sim_details (list[SimulationDetails]): List of multipliers to run
-    board (list[Tile]): The board
-    num_rounds (int): The number of times to run simulation
-    num_dices (list[int]): List of the number of dice to start each simulation with
-    points_to_meet (int): Number of points to aim for. The sim will stop if we reach this threshold even if we didn't use all starting dice.
-    output_csv (bool): Whether we should output the runs in a CSV
-  """
-  for sim in sim_details:
-    runs = []
-    print(sim.label)
-    for dices in num_dices:
-      print('Simulation of {:,} players starting with {:,} dice each trying to reach {:,} points:'.format(num_rounds, dices, points_to_meet))
-      print('Applied Multipliers: {}'.format(sim.multipliers))
-      dataset = {}
-      for i in range(num_rounds):
-        result = simulate_single_run(board, sim.multipliers, dices, points_to_meet)
-        add_round_to_dataset(dataset, result.stats)
-        if (i % 10000 == 9999):
-          print(f'{i+1} sims done')
-      df = pandas.DataFrame(dataset)
-      output_stats(df)
-      runs.append(df)
-    sim_df = pandas.concat(runs)
-    if (csv):
-      sim_df.to_csv(f"generated/{sim.label}.csv", index=False)
+    boards (list[list[Tile] | numpy.ndarray]): The boards. A board can also be given as an array of the (points, dice) value of every tile.
+    multipliers (list[int], optional): The multipliers to set around each board. Defaults to [2, 3, 5, 10].
 
-board = [
-  FlatTile(points=400),
-  FlatTile(gems=50),
-  FlatTile(points=50),
-  FlatTile(points=400),
-  FlatTile(points=800),
-  FlatTile(points=50),
-  FlatTile(dice=2),
-  FlatTile(gems=50),
-  GrandPrizeTile(),
-  FlatTile(),           # GREEN PRESENT
-  PointWheelTile(),
-  FlatTile(points=50),
-  FlatTile(points=200),
-  FlatTile(),           # GREEN PRESENT
-  FlatTile(dice=2),
-  FlatTile(points=200),
-  FlatTile(points=800),
-  FlatTile(),           # GREEN PRESENT
-  FlatTile(points=50),
-  FlatTile(points=200),
-  PointWheelTile(),
-  FlatTile(),           # GREEN PRESENT
-  FateWheelTile(),
-  FlatTile(points=200),
-]
+  Returns:
+    list[numpy.ndarray]: For every board, the best multipliers to apply when rolling from each tile with one row per multiplier
+  """
+  multipliers = numpy.asarray(multipliers)
+  results = [None] * len(boards)
+  values = [board if isinstance(board, numpy.ndarray) else compile_board(board).tile_values for board in boards]
+  for size in set(len(value) for value in values):
+    indices = [i for i, value in enumerate(values) if len(value) == size]
+    # boards x tiles x (points, dice)
+    tile_values = numpy.stack([values[i] for i in indices]).astype(float)
+    #dice value = average points gained per die / (1 - average die gained per die)
+    dice_value = tile_values[:, :, 0].mean(axis=1) / (1 - tile_values[:, :, 1].mean(axis=1))
+    # calculated value of tiles in terms of points with NO APPLIED MULTIPLIERS
+    tile_calc_values = tile_values[:, :, 0] + tile_values[:, :, 1] * dice_value[:, None]
+    # get the total point value of each tile based on what tiles can be reached from it
+    total_points, total_dice = numpy.moveaxis(expected_reachable_values(tile_values), -1, 0)
+    total_value = expected_reachable_values(tile_calc_values[:, :, None])[:, :, 0]
 
-sims = [
-  # SimulationDetails('BestMultipliers', calc_best_multipliers(board, 10)),
-  SimulationDetails('5x10', [ 1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 10, 1 ]),
-  SimulationDetails('bublite', [1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 10, 10]),
-]
+    # sort the indices of the tiles such that the values are in descending order
+    sorted_index = numpy.argsort(-total_value, axis=1, kind='stable')
+    # running sums after setting the k best tiles to the multiplier, for every board (axis 0), multiplier (axis 1) and k (axis 2)
+    extra = (multipliers - 1)[None, :, None]
+    count = numpy.arange(1, size + 1)[None, None, :]
+    sum_multipliers = size + extra * count
+    sum_points = total_points.sum(axis=1)[:, None, None] + extra * numpy.cumsum(numpy.take_along_axis(total_points, sorted_index, axis=1), axis=1)[:, None, :]
+    sum_dice = total_dice.sum(axis=1)[:, None, None] + extra * numpy.cumsum(numpy.take_along_axis(total_dice, sorted_index, axis=1), axis=1)[:, None, :]
+    # Average Projected Dice Value = Sum(PDVxM) / Sum(Tile Multipliers)
+    avg_num_dice = sum_dice / sum_multipliers
+    # PPID = Sum(Project Points Value of Tile * Tile Multiplier) / Sum(Tile Multipliers) / (1 - Average Projected Dice Value)
+    ppd = sum_points / sum_multipliers / (1 - avg_num_dice)
+    # keep setting tiles until the PPID drops
+    best_ppd = numpy.concatenate((numpy.broadcast_to(total_value.mean(axis=1)[:, None, None], ppd[:, :, :1].shape), ppd[:, :, :-1]), axis=2)
+    drops = ppd < best_ppd
+    num_set = numpy.where(drops.any(axis=2), drops.argmax(axis=2), size)
 
-def calculate_success_rate(goal_points: int, num_dice: int, current_points: int = 0, rolls_done: int = 0, current_tile: int = 0):
-  """Run 10,000 simulations and get how many of those runs were able to achieve the goal set
+    # rank of every tile in the sorted order
+    rank = numpy.argsort(sorted_index, axis=1)
+    best_multipliers = numpy.where(rank[:, None, :] < num_set[:, :, None], multipliers[None, :, None], 1)
+    for i, best in zip(indices, best_multipliers):
+      results[i] = best
+  return results
+
+def calc_best_multipliers(board: list[Tile], multiplier: int):
+  """Calculate the best multipliers for the board
 
   Args:
-    goal_points (int): The number of points to aim for
+    board (list[Tile]): The board
+    multiplier (int): The multiplier to set around the board
+
+  Returns:
+    list[int]: The best multipliers to apply when rolling from each tile of the board
+  """
+  return calc_best_multipliers_batch([board], [multiplier])[0][0].tolist()
+
+def output_stats(df: 'pandas.DataFrame'):
+  avg_stats = df.mean()
+  print(f"PPID: {avg_stats[Stat.POINTS] / (avg_stats[Stat.INITIAL_DICE] - avg_stats[Stat.EXTRA_DICE])}")
+  print(f"PPR: {avg_stats[Stat.POINTS] / avg_stats[Stat.ROLLS_DONE]}")
+  print(avg_stats)
+
+class QuantileSketch:
+  """Mergeable sketch of a distribution of non-negative numbers. Every number goes in a bucket whose bounds grow by a fixed ratio,
+  so any quantile it gives is within relative_accuracy of the real one no matter how many numbers are added.
+  """
+  def __init__(self, relative_accuracy: float = 0.01):
+    """Create an empty sketch
+
+    Args:
+      relative_accuracy (float, optional): How far a quantile can be from the real one as a fraction of it. Defaults to 0.01.
+    """
+    self.relative_accuracy = relative_accuracy
+    self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+    self.log_gamma = math.log(self.gamma)
+    self.buckets: dict[int, int] = {}
+    self.zero_count = 0
+    self.count = 0
+
+  def add(self, values: numpy.ndarray):
+    """Add numbers to the sketch
+
+    Args:
+      values (numpy.ndarray): Numbers to add
+    """
+    values = numpy.asarray(values, dtype=float)
+    positive = values[values > 0]
+    self.zero_count += len(values) - len(positive)
+    self.count += len(values)
+    indices, counts = numpy.unique(numpy.ceil(numpy.log(positive) / self.log_gamma).astype(numpy.int64), return_counts=True)
+    for index, count in zip(indices.tolist(), counts.tolist()):
+      self.buckets[index] = self.buckets.get(index, 0) + count
+
+  def merge(self, other: 'QuantileSketch'):
+    """Add every number of another sketch with the same accuracy to this one
+
+    Args:
+      other (QuantileSketch): Sketch to add
+    """
+    self.zero_count += other.zero_count
+    self.count += other.count
+    for index, count in other.buckets.items():
+      self.buckets[index] = self.buckets.get(index, 0) + count
+
+  def quantile(self, q: float):
+    """Get a quantile of the numbers added
+
+    Args:
+      q (float): Quantile between 0 and 1
+
+    Returns:
+      float: The quantile. nan if the sketch is empty.
+    """
+    return float(self.quantiles([q])[0])
+
+  def quantiles(self, qs: list[float]):
+    """Get many quantiles of the numbers added in one pass over the buckets
+
+    Args:
+      qs (list[float]): Quantiles between 0 and 1
+
+    Returns:
+      numpy.ndarray: The quantiles. nan if the sketch is empty.
+    """
+    qs = numpy.asarray(qs, dtype=float)
+    if (self.count == 0):
+      return numpy.full(len(qs), math.nan)
+    if (not self.buckets):
+      return numpy.zeros(len(qs))
+    indices = numpy.array(sorted(self.buckets))
+    seen = self.zero_count + numpy.cumsum([self.buckets[index] for index in indices.tolist()])
+    ranks = qs * (self.count - 1)
+    # first bucket that has more numbers before the end of it than the rank, ranks within the zeros give 0
+    positions = numpy.minimum(numpy.searchsorted(seen, ranks, side='right'), len(indices) - 1)
+    # middle of the bucket in relative terms
+    return numpy.where(ranks < self.zero_count, 0.0, 2 * self.gamma ** indices[positions].astype(float) / (self.gamma + 1))
+
+class StatsAccumulator:
+  """Running statistics of simulation rounds that never keeps the rounds themselves, so memory stays the same no matter how many rounds we run.
+  Keeps the mean and covariance of every stat, how many rounds met each breakpoint and the goal, and a quantile sketch of every stat. Accumulators can be merged.
+  """
+  # rounds added one at a time are held here and added together once there are this many
+  pending_size = 1000
+
+  def __init__(self, goal_points: int = math.inf, relative_accuracy: float = 0.01):
+    """Create an empty accumulator
+
+    Args:
+      goal_points (int, optional): Number of points a round needs to count as a success. Defaults to math.inf.
+      relative_accuracy (float, optional): Accuracy of the quantile sketches. Defaults to 0.01.
+    """
+    self.goal_points = goal_points
+    self.count = 0
+    self.goal_met_count = 0
+    self.means = numpy.zeros(len(Stat))
+    # sum of products of differences from the mean between every pair of stats. The diagonal is the sum of squared differences.
+    self.comoments = numpy.zeros((len(Stat), len(Stat)))
+    # number of rounds that met each points breakpoint and each roll dice task breakpoint
+    self.points_bp_counts = numpy.zeros(len(SimResult.points_breakpoints), dtype=numpy.int64)
+    self.roll_dice_bp_counts = numpy.zeros(len(SimResult.roll_dice_task_breakpoints), dtype=numpy.int64)
+    self.sketches = { stat: QuantileSketch(relative_accuracy) for stat in Stat }
+    self.pending = []
+    # PPID estimate of the same rounds when they are simulated with variance reduction
+    self.variance_reduced = None
+
+  def add(self, stats: dict):
+    """Add a single simulation round
+
+    Args:
+      stats (dict): simulation stats to add
+    """
+    self.pending.append([stats[stat] for stat in Stat])
+    if (len(self.pending) >= self.pending_size):
+      self.flush()
+
+  def add_batch(self, stats: dict):
+    """Add a batch of simulation rounds
+
+    Args:
+      stats (dict): stats of the batch to add. Every stat is a numpy array with one entry per round
+    """
+    self.add_rows(numpy.column_stack([numpy.asarray(stats[stat], dtype=float) for stat in Stat]))
+
+  def add_rows(self, rows: numpy.ndarray):
+    """Add simulation rounds as a table with one row per round and one column per stat
+
+    Args:
+      rows (numpy.ndarray): Rounds to add
+    """
+    if (len(rows) == 0):
+      return
+    count = len(rows)
+    means = rows.mean(axis=0)
+    differences = rows - means
+    self.combine(count, means, differences.T @ differences)
+
+    points = rows[:, stat_index[Stat.POINTS]]
+    rolls = rows[:, stat_index[Stat.ROLLS_DONE]]
+    self.goal_met_count += int((points >= self.goal_points).sum())
+    self.points_bp_counts += (points[:, None] >= numpy.array(SimResult.points_breakpoints)[None, :]).sum(axis=0)
+    self.roll_dice_bp_counts += (rolls[:, None] >= numpy.array(SimResult.roll_dice_task_breakpoints)[None, :]).sum(axis=0)
+    for i, stat in enumerate(Stat):
+      self.sketches[stat].add(rows[:, i])
+
+  def combine(self, count: int, means: numpy.ndarray, comoments: numpy.ndarray):
+    """Combine the mean and covariance of another set of rounds into ours
+
+    Args:
+      count (int): Number of rounds in the other set
+      means (numpy.ndarray): Mean of every stat in the other set
+      comoments (numpy.ndarray): Sum of products of differences from the mean of every pair of stats in the other set
+    """
+    total = self.count + count
+    delta = means - self.means
+    self.means = self.means + delta * count / total
+    self.comoments = self.comoments + comoments + numpy.outer(delta, delta) * self.count * count / total
+    self.count = total
+
+  def flush(self):
+    """Add any rounds that were added one at a time and are still pending
+    """
+    if (self.pending):
+      rows = numpy.array(self.pending, dtype=float)
+      self.pending = []
+      self.add_rows(rows)
+
+  def merge(self, other: 'StatsAccumulator'):
+    """Add every round of another accumulator to this one
+
+    Args:
+      other (StatsAccumulator): Accumulator to add
+    """
+    self.flush()
+    other.flush()
+    if (other.count == 0):
+      return
+    if (self.count == 0):
+      self.goal_points = other.goal_points
+    self.combine(other.count, other.means, other.comoments)
+    self.goal_met_count += other.goal_met_count
+    self.points_bp_counts += other.points_bp_counts
+    self.roll_dice_bp_counts += other.roll_dice_bp_counts
+    for stat in Stat:
+      self.sketches[stat].merge(other.sketches[stat])
+    if (other.variance_reduced is not None):
+      if (self.variance_reduced is None):
+        self.variance_reduced = VarianceReducedEstimate(other.variance_reduced.methods)
+      self.variance_reduced.merge(other.variance_reduced)
+
+  def mean(self, stat: Stat):
+    self.flush()
+    return self.means[stat_index[stat]]
+
+  def covariance(self, stat1: Stat, stat2: Stat):
+    self.flush()
+    return self.comoments[stat_index[stat1], stat_index[stat2]] / (self.count - 1) if self.count > 1 else math.nan
+
+  def variance(self, stat: Stat):
+    return self.covariance(stat, stat)
+
+  def quantile(self, stat: Stat, q: float):
+    self.flush()
+    return self.sketches[stat].quantile(q)
+
+  def ppid(self):
+    """Points per initial die across every round
+    """
+    return self.mean(Stat.POINTS) / (self.mean(Stat.INITIAL_DICE) - self.mean(Stat.EXTRA_DICE))
+
+  def ppr(self):
+    """Points per roll across every round
+    """
+    return self.mean(Stat.POINTS) / self.mean(Stat.ROLLS_DONE)
+
+  def success_rate(self):
+    """Share of rounds that met goal_points
+    """
+    self.flush()
+    return self.goal_met_count / self.count if self.count > 0 else math.nan
+
+  def ppid_standard_error(self):
+    """Standard error of the PPID. PPID is a ratio of means (points over dice used) so this uses the delta method.
+    """
+    initial_dice = self.mean(Stat.INITIAL_DICE) - self.mean(Stat.EXTRA_DICE)
+    ppid = self.ppid()
+    # variance of points - ppid * (initial dice - extra dice)
+    variance = (self.variance(Stat.POINTS)
+      - 2 * ppid * (self.covariance(Stat.POINTS, Stat.INITIAL_DICE) - self.covariance(Stat.POINTS, Stat.EXTRA_DICE))
+      + ppid ** 2 * (self.variance(Stat.INITIAL_DICE) - 2 * self.covariance(Stat.INITIAL_DICE, Stat.EXTRA_DICE) + self.variance(Stat.EXTRA_DICE)))
+    return math.sqrt(max(variance, 0) / self.count) / initial_dice
+
+  def success_rate_standard_error(self):
+    """Standard error of the success rate
+    """
+    success_rate = self.success_rate()
+    return math.sqrt(success_rate * (1 - success_rate) / self.count)
+
+  def relative_error(self, target: str = 'ppid', z: float = 1.96):
+    """Half width of the confidence interval of the target relative to its value
+
+    Args:
+      target (str, optional): 'ppid' or 'success_rate'. Defaults to 'ppid'.
+      z (float, optional): Number of standard errors in the half width. Defaults to 1.96 for a 95% confidence interval.
+
+    Returns:
+      float: The relative error. inf if there are too few rounds to tell.
+    """
+    if (self.count < 2):
+      return math.inf
+    if (target == 'ppid' and self.variance_reduced is not None):
+      value, standard_error = self.variance_reduced.ppid(), self.variance_reduced.ppid_standard_error()
+    elif (target == 'ppid'):
+      value, standard_error = self.ppid(), self.ppid_standard_error()
+    elif (target == 'success_rate'):
+      value, standard_error = self.success_rate(), self.success_rate_standard_error()
+    else:
+      raise ValueError(f'Unknown target {target}')
+    if (standard_error == 0):
+      return 0.0
+    return z * standard_error / value if value > 0 else math.inf
+
+class VarianceReducedEstimate:
+  """PPID of rounds simulated with variance reduction, along with its standard error.
+
+  Antithetic rounds come in pairs that are not independent, so each pair is averaged into one unit first. With control variates,
+  points and dice used are regressed on the luck of every spin and roll (which is known to average 0) and the part of them it
+  explains is taken out. Stratified spins make rounds slightly negatively related, which the standard error doesn't count on,
+  so it is a bit pessimistic when they are used.
+  """
+  known_methods = ['antithetic', 'control_variates', 'stratified']
+
+  def __init__(self, methods: list[str]):
+    """Create an empty estimate
+
+    Args:
+      methods (list[str]): The variance reduction methods the rounds are simulated with
+    """
+    for method in methods:
+      if (method not in self.known_methods):
+        raise ValueError(f"Unknown variance reduction method {method}. Use any of {', '.join(self.known_methods)}")
+    self.methods = list(methods)
+    self.num_control_variates = len(BatchSimResult.control_variate_names) if 'control_variates' in methods else 0
+    # number of independent units (rounds, or antithetic pairs) and number of rounds they are made of
+    self.count = 0
+    self.rounds = 0
+    # points, dice used, then every control variate
+    self.means = numpy.zeros(2 + self.num_control_variates)
+    self.comoments = numpy.zeros((len(self.means), len(self.means)))
+
+  def add_batch(self, result: BatchSimResult):
+    """Add a batch of rounds simulated with the methods of this estimate
+
+    Args:
+      result (BatchSimResult): The batch. Antithetic pairs are run i and i + (num_runs + 1) // 2, like in RandomTape.
+    """
+    stats = result.stats
+    columns = [stats[Stat.POINTS], stats[Stat.INITIAL_DICE] - stats[Stat.EXTRA_DICE]]
+    if (self.num_control_variates):
+      columns += list(result.control_variates.T)
+    rows = numpy.column_stack(columns).astype(float)
+    if ('antithetic' in self.methods):
+      num_drawn = (len(rows) + 1) // 2
+      num_mirrored = len(rows) - num_drawn
+      # an odd run out has no pair and counts as a unit on its own
+      rows = numpy.concatenate(((rows[:num_mirrored] + rows[num_drawn:]) / 2, rows[num_mirrored:num_drawn]))
+    self.rounds += result.num_runs
+    if (len(rows) == 0):
+      return
+    means = rows.mean(axis=0)
+    differences = rows - means
+    self.combine(len(rows), means, differences.T @ differences)
+
+  def combine(self, count: int, means: numpy.ndarray, comoments: numpy.ndarray):
+    """Combine the mean and covariance of another set of units into ours
+
+    Args:
+      count (int): Number of units in the other set
+      means (numpy.ndarray): Mean of every column in the other set
+      comoments (numpy.ndarray): Sum of products of differences from the mean of every pair of columns in the other set
+    """
+    total = self.count + count
+    delta = means - self.means
+    self.means = self.means + delta * count / total
+    self.comoments = self.comoments + comoments + numpy.outer(delta, delta) * self.count * count / total
+    self.count = total
+
+  def merge(self, other: 'VarianceReducedEstimate'):
+    """Add every round of another estimate with the same methods to this one
+
+    Args:
+      other (VarianceReducedEstimate): Estimate to add
+    """
+    self.rounds += other.rounds
+    if (other.count > 0):
+      self.combine(other.count, other.means, other.comoments)
+
+  def adjusted_means(self):
+    """Means of points and dice used with the luck the control variates explain taken out
+
+    Returns:
+      tuple[numpy.ndarray, numpy.ndarray]: Adjusted means of points and dice used, regression coefficients of them on the control variates
+    """
+    covariance = self.comoments / (self.count - 1)
+    if (self.num_control_variates == 0):
+      return self.means[:2], numpy.zeros((0, 2))
+    coefficients = numpy.linalg.pinv(covariance[2:, 2:]) @ covariance[2:, :2]
+    return self.means[:2] - self.means[2:] @ coefficients, coefficients
+
+  def ppid(self):
+    """Points per initial die across every round
+    """
+    if (self.count < 2):
+      return math.nan
+    (points, dice_used), _ = self.adjusted_means()
+    return points / dice_used
+
+  def ppid_standard_error(self):
+    """Standard error of the PPID, using the delta method like StatsAccumulator.ppid_standard_error
+    """
+    if (self.count < 2):
+      return math.nan
+    (points, dice_used), _ = self.adjusted_means()
+    covariance = self.comoments / (self.count - 1)
+    # variance of points - ppid * dice used, less the part the control variates explain
+    weights = numpy.array([1, -points / dice_used])
+    variance = weights @ covariance[:2, :2] @ weights
+    if (self.num_control_variates):
+      explained = weights @ covariance[:2, 2:]
+      variance -= explained @ numpy.linalg.pinv(covariance[2:, 2:]) @ explained
+    return math.sqrt(max(variance, 0) / self.count) / dice_used
+
+def output_accumulated_stats(accumulator: StatsAccumulator, percentiles: list[int] = [5, 25, 50, 75, 95]):
+  """Print the same stats as output_stats, along with percentiles and breakpoints met, from an accumulator
+
+  Args:
+    accumulator (StatsAccumulator): The accumulated rounds
+    percentiles (list[int], optional): Percentiles to print. Defaults to [5, 25, 50, 75, 95].
+  """
+  print(f"PPID: {accumulator.ppid()} ± {1.96 * accumulator.ppid_standard_error():.3f}")
+  estimate = accumulator.variance_reduced
+  if (estimate is not None and estimate.count > 1):
+    # how many times less variance than plain rounds, and so how many plain rounds it is worth
+    reduction = (accumulator.ppid_standard_error() / estimate.ppid_standard_error()) ** 2
+    print(f"Variance reduced PPID ({', '.join(estimate.methods)}): {estimate.ppid()} ± {1.96 * estimate.ppid_standard_error():.3f}, {reduction:,.1f}x less variance, worth {reduction * estimate.rounds:,.0f} plain rounds")
+  print(f"PPR: {accumulator.ppr()}")
+  if (accumulator.goal_points != math.inf):
+    print(f"Success rate: {accumulator.success_rate():.4%} ± {1.96 * accumulator.success_rate_standard_error():.4%}")
+  width = max(len(str(stat)) for stat in Stat)
+  print(f"{'':{width}}  {'mean':>12}  {'std':>12}  " + "  ".join(f"{f'p{p}':>10}" for p in percentiles))
+  for stat in Stat:
+    quantiles = "  ".join(f"{accumulator.quantile(stat, p / 100):>10.1f}" for p in percentiles)
+    print(f"{str(stat):{width}}  {accumulator.mean(stat):>12.5f}  {math.sqrt(accumulator.variance(stat)):>12.5f}  {quantiles}")
+  met = ", ".join(f"{bp:,}: {count / accumulator.count:.2%}" for bp, count in zip(SimResult.points_breakpoints, accumulator.points_bp_counts) if count > 0)
+  print(f"Points breakpoints met: {met}")
+
+class RunHistory:
+  """The state of runs after every single roll, kept in preallocated typed arrays.
+
+  Only every `every`-th run is recorded. Once `capacity` rolls are held, they are either written to a new npz file in
+  `directory` (so nothing is lost) or, with no directory, the oldest rolls are overwritten (so only the latest are kept).
+  """
+  columns = {
+    'run': numpy.int32,
+    'step': numpy.int32,
+    'tile': numpy.int16,
+    'roll': numpy.int8,
+    'multiplier': numpy.int8,
+    'points': numpy.int32,
+    'rolls_done': numpy.int32,
+    'initial_dice': numpy.int32,
+    'extra_dice': numpy.int32,
+  }
+
+  def __init__(self, every: int = 1, capacity: int = 1_000_000, directory: str = None, first_run: int = 0):
+    """Create an empty history
+
+    Args:
+      every (int, optional): Record every this many runs. Defaults to 1.
+      capacity (int, optional): Number of rolls to hold in memory. None to grow as needed instead. Defaults to 1,000,000.
+      directory (str, optional): Directory to write the rolls to whenever we hold capacity rolls. Defaults to None to overwrite the oldest rolls instead.
+      first_run (int, optional): Index of our first run among every run, so a shard of the runs records the same runs as one history of them all would. Defaults to 0.
+    """
+    self.every = every
+    self.first_run = first_run
+    self.capacity = capacity
+    self.directory = directory
+    self.arrays = { name: numpy.empty(capacity if capacity else 1024, dtype=dtype) for name, dtype in self.columns.items() }
+    # number of rolls held, where the next one goes, rolls overwritten and files written
+    self.size = 0
+    self.position = 0
+    self.dropped = 0
+    self.files = 0
+    if (directory is not None):
+      # start a new history rather than mixing with one written before
+      os.makedirs(directory, exist_ok=True)
+      for file in os.listdir(directory):
+        if (file.startswith('history_') and file.endswith('.npz')):
+          os.remove(os.path.join(directory, file))
+
+  def samples(self, run: int):
+    """Whether a run is recorded
+
+    Args:
+      run (int): Index of the run
+    """
+    return (self.first_run + run) % self.every == 0
+
+  def record(self, run: int, step: int, result: SimResult, roll: int, multiplier: int):
+    """Record a single roll of a run
+
+    Args:
+      run (int): Index of the run
+      step (int): Number of rolls the run did before this one
+      result (SimResult): The state of the run after the roll
+      roll (int): The sum of the two dice
+      multiplier (int): The multiplier applied to the roll
+    """
+    if (self.size == len(self.arrays['run'])):
+      self.make_room()
+    stats = result.stats
+    row = self.position
+    arrays = self.arrays
+    arrays['run'][row] = run
+    arrays['step'][row] = step
+    arrays['tile'][row] = stats[Stat.TILE]
+    arrays['roll'][row] = roll
+    arrays['multiplier'][row] = multiplier
+    arrays['points'][row] = stats[Stat.POINTS]
+    arrays['rolls_done'][row] = stats[Stat.ROLLS_DONE]
+    arrays['initial_dice'][row] = stats[Stat.INITIAL_DICE]
+    arrays['extra_dice'][row] = stats[Stat.EXTRA_DICE]
+    self.position = (row + 1) % len(arrays['run'])
+    if (self.size == len(arrays['run'])):
+      self.dropped += 1
+    else:
+      self.size += 1
+
+  def record_batch(self, runs: numpy.ndarray, steps: numpy.ndarray, result: BatchSimResult, rolls: numpy.ndarray, multipliers: numpy.ndarray):
+    """Record a roll of many runs of a batch
+
+    Args:
+      runs (numpy.ndarray): Indices of the runs
+      steps (numpy.ndarray): Number of rolls each run did before this one
+      result (BatchSimResult): The state of the batch after the roll
+      rolls (numpy.ndarray): The sum of the two dice of each run
+      multipliers (numpy.ndarray): The multiplier each run applied to the roll
+    """
+    stats = result.stats
+    self.append({
+      'run': runs,
+      'step': steps,
+      'tile': stats[Stat.TILE][runs],
+      'roll': rolls,
+      'multiplier': multipliers,
+      'points': stats[Stat.POINTS][runs],
+      'rolls_done': stats[Stat.ROLLS_DONE][runs],
+      'initial_dice': stats[Stat.INITIAL_DICE][runs],
+      'extra_dice': stats[Stat.EXTRA_DICE][runs],
+    })
+
+  def append(self, columns: dict):
+    """Record many rolls at once
+
+    Args:
+      columns (dict): Every column of the rolls as a numpy array
+    """
+    count = len(columns['run'])
+    start = 0
+    while (start < count):
+      if (self.size == len(self.arrays['run'])):
+        self.make_room()
+      length = len(self.arrays['run'])
+      # fill up to the end of the arrays, then wrap around over the oldest rolls
+      piece = min(count - start, length - self.position)
+      self.dropped += max(0, self.size + piece - length)
+      for name, array in self.arrays.items():
+        array[self.position:self.position + piece] = columns[name][start:start + piece]
+      self.position = (self.position + piece) % length
+      self.size = min(self.size + piece, length)
+      start += piece
+
+  def make_room(self):
+    """Called when the arrays are full. Writes them to a file or doubles them. Otherwise the oldest rolls will be overwritten.
+    """
+    if (self.directory is not None):
+      self.flush()
+    elif (self.capacity is None):
+      # arrays that grow are never wrapped so they are already in order
+      for name in self.arrays:
+        self.arrays[name] = numpy.concatenate((self.arrays[name], numpy.empty_like(self.arrays[name])))
+      self.position = self.size
+
+  def flush(self):
+    """Write the rolls held to a new file in the directory
+    """
+    if (self.directory is None or self.size == 0):
+      return
+    self.write_file(self.ordered())
+    self.size = 0
+    self.position = 0
+
+  def write_file(self, columns: dict):
+    """Write rolls to the next file in the directory
+
+    Args:
+      columns (dict): Every column of the rolls as a numpy array
+    """
+    numpy.savez_compressed(os.path.join(self.directory, f'history_{self.files:05d}.npz'), **columns)
+    self.files += 1
+
+  def close(self):
+    """Write the rolls held to the directory and let go of the arrays, once nothing more will be recorded
+    """
+    self.flush()
+    if (self.directory is not None):
+      self.arrays = { name: array[:0] for name, array in self.arrays.items() }
+
+  def ordered(self):
+    """Get the rolls held from oldest to newest
+
+    Returns:
+      dict: Every column as a numpy array
+    """
+    length = len(self.arrays['run'])
+    if (self.size == 0):
+      return { name: array[:0] for name, array in self.arrays.items() }
+    start = (self.position - self.size) % length
+    if (start + self.size <= length):
+      return { name: array[start:start + self.size] for name, array in self.arrays.items() }
+    return { name: numpy.concatenate((array[start:], array[:self.position])) for name, array in self.arrays.items() }
+
+  def merge(self, other: 'RunHistory', run_offset: int = 0):
+    """Record every roll of another history
+
+    Args:
+      other (RunHistory): History to take the rolls of. Any files it wrote are removed once they are merged.
+      run_offset (int, optional): Number to add to the runs of the other history so they don't clash with ours. Defaults to 0.
+    """
+    if (other.directory is not None):
+      # write the rolls we hold first so they stay in order, then each file of the other history becomes one of ours so we
+      # never hold more than one file of rolls on top of our own
+      self.flush()
+      for file in sorted(file for file in os.listdir(other.directory) if file.startswith('history_') and file.endswith('.npz')):
+        path = os.path.join(other.directory, file)
+        with numpy.load(path) as data:
+          columns = { name: data[name] for name in self.columns }
+        columns['run'] += run_offset
+        if (self.directory is not None):
+          self.write_file(columns)
+        else:
+          self.append(columns)
+        os.remove(path)
+      if (not os.listdir(other.directory)):
+        os.rmdir(other.directory)
+    columns = other.ordered()
+    self.append({ **columns, 'run': columns['run'] + run_offset })
+
+  def to_dataframe(self):
+    """Get every roll recorded, including any written to the directory, as a DataFrame
+    """
+    import pandas
+    self.flush()
+    return load_history(self.directory) if self.directory is not None else pandas.DataFrame(self.ordered())
+
+def load_history(directory: str):
+  """Load a history written to a directory
+
+  Args:
+    directory (str): Directory the history was written to
+
+  Returns:
+    pandas.DataFrame: Every roll, one row each
+  """
+  import pandas
+  files = sorted(file for file in os.listdir(directory) if file.startswith('history_') and file.endswith('.npz'))
+  frames = []
+  for file in files:
+    with numpy.load(os.path.join(directory, file)) as data:
+      frames.append(pandas.DataFrame({ name: data[name] for name in RunHistory.columns }))
+  return pandas.concat(frames, ignore_index=True) if frames else pandas.DataFrame({ name: numpy.empty(0, dtype=dtype) for name, dtype in RunHistory.columns.items() })
+
+class Instrumentation:
+  """Counters and timers for what simulate_single_run spends its time on. Pass one to simulate_single_run to fill it in.
+  When no instrumentation is passed the runs don't do any of this, so it costs nothing when it is off.
+  """
+  def __init__(self):
+    self.runs = 0
+    # rolls done in the main loop and while chasing the next roll dice breakpoint
+    self.rolls = { 'main': 0, 'chase': 0 }
+    self.runs_chasing = 0
+    self.phase_ns = { 'main': 0, 'chase': 0 }
+    self.rng_ns = 0
+    self.accumulation_ns = 0
+    # landings and time spent rolling onto each type of tile
+    self.tile_landings: dict[str, int] = {}
+    self.tile_ns: dict[str, int] = {}
+    # how often each cap was what limited the multiplier, per phase
+    self.multiplier_caps = { 'main': {}, 'chase': {} }
+    self.points_bp_hits = 0
+    self.roll_dice_bp_hits = 0
+
+  def record_multiplier(self, phase: str, wanted: int, applied: int):
+    """Record the multiplier applied to a roll
+
+    Args:
+      phase (str): 'main' or 'chase'
+      wanted (int): The multiplier of the tile
+      applied (int): The multiplier applied after the caps
+    """
+    cap = f'{applied}x' if applied < wanted else 'uncapped'
+    caps = self.multiplier_caps[phase]
+    caps[cap] = caps.get(cap, 0) + 1
+    self.rolls[phase] += 1
+
+  def report(self):
+    """Get everything recorded
+
+    Returns:
+      dict: The report
+    """
+    total_ns = sum(self.phase_ns.values())
+    return {
+      'runs': self.runs,
+      'rolls': dict(self.rolls),
+      'runs_chasing_roll_dice_breakpoint': self.runs_chasing,
+      'time_ms': {
+        'total': total_ns / 1e6,
+        'main': self.phase_ns['main'] / 1e6,
+        'chase': self.phase_ns['chase'] / 1e6,
+        'rng': self.rng_ns / 1e6,
+        'accumulation': self.accumulation_ns / 1e6,
+        'other': (total_ns - self.rng_ns - self.accumulation_ns) / 1e6,
+      },
+      'tiles': { tile_type: { 'landings': self.tile_landings[tile_type], 'time_ms': self.tile_ns[tile_type] / 1e6 } for tile_type in sorted(self.tile_landings) },
+      'multiplier_caps': { phase: dict(sorted(caps.items())) for phase, caps in self.multiplier_caps.items() },
+      'breakpoint_hits': { 'points': self.points_bp_hits, 'roll_dice_task': self.roll_dice_bp_hits },
+    }
+
+  def print_report(self):
+    print(json.dumps(self.report(), indent=2))
+
+def profile_runs(board: list[Tile], multipliers: list[int], num_dice_rolls: int, points_to_meet: int, num_runs: int = 1000, seed: int = None):
+  """Simulate runs with instrumentation on and print the report
+
+  Args:
+    board (list[Tile]): The board
+    multipliers (list[int]): The multipliers to apply when rolling from each tile
+    num_dice_rolls (int): Number of dice to start each run with
+    points_to_meet (int): Number of points to aim for
+    num_runs (int, optional): Number of runs to simulate. Defaults to 1000.
+    seed (int, optional): Seed for the runs. Defaults to None.
+
+  Returns:
+    dict: The report
+  """
+  random.seed(seed)
+  instrumentation = Instrumentation()
+  for i in range(num_runs):
+    simulate_single_run(board, multipliers, num_dice_rolls, points_to_meet, instrumentation=instrumentation)
+  instrumentation.print_report()
+  return instrumentation.report()
+
+def simulate_single_run(board: list[Tile], multipliers: list[int], num_dice_rolls: int, points_to_meet: int, prev_run: SimResult = None, skip_next_bp: bool = False, history: RunHistory = None, run: int = 0, instrumentation: Instrumentation = None, policy: 'MultiplierPolicy' = None):
+  """Simulate going around the board starting with a specified number of dice rolls
+
+  Args:
+    board (list[Tile]): The board
+    multipliers (list[int]): The multipliers to apply when rolling from each tile
+    num_dice_rolls (int): Number of dice to start with. The sim will stop if all of these dice are used.
+    points_to_meet (int): Number of points to aim for. The sim will stop if we reach this threshold even if we didn't use all starting dice.
+    prev_run (SimResult): Previous run that we want to add to.
+    history (RunHistory): Where to record the state after every roll. None to not record.
+    run (int): Index of this run in the history
+    instrumentation (Instrumentation): Where to count and time what the run does. None to not instrument.
+    policy (MultiplierPolicy): Policy to pick the multiplier of every roll with until we meet points_to_meet. The multipliers are still used to chase the next roll dice breakpoint. None to only use the multipliers.
+  
+  Returns:
+    SimResult: Result of simulation
+  """
+  if (policy is not None):
+    policy.check_goal(points_to_meet)
+    policy.check_board(board)
+  compiled = compile_board(board)
+  result = prev_run if prev_run else SimResult() 
+  values = result.values
+  step = 0
+  if (instrumentation is not None):
+    instrumentation.runs += 1
+    phase_start = time.perf_counter_ns()
+  while (values[SimResult.POINTS] < points_to_meet and (num_dice_rolls - values[SimResult.INITIAL_DICE] + values[SimResult.EXTRA_DICE] > 0)) :
+    # get multiplier then check if it's allowed
+    num_turns = num_dice_rolls - values[SimResult.INITIAL_DICE] + values[SimResult.EXTRA_DICE]
+    if (policy is not None):
+      multiplier = policy.multiplier(values[SimResult.TILE], values[SimResult.POINTS], values[SimResult.ROLLS_DONE], num_turns)
+    else:
+      multiplier = multipliers[values[SimResult.TILE]]
+      cap = scalar_turn_caps[num_turns if num_turns < max_capped_turns else max_capped_turns]
+      if (cap < multiplier):
+        multiplier = cap
+
+    # roll the dice, land on new tile and get the reward
+    if (instrumentation is not None):
+      instrumentation.record_multiplier('main', multipliers[values[SimResult.TILE]], multiplier)
+      roll = compiled.instrumented_roll(multiplier, result, instrumentation)
+    else:
+      roll = compiled.roll(multiplier, result)
+    if (history is not None):
+      history.record(run, step, result, roll, multiplier)
+      step += 1
+
+  if (instrumentation is not None):
+    phase_end = time.perf_counter_ns()
+    instrumentation.phase_ns['main'] += phase_end - phase_start
+    phase_start = phase_end
+
+  if (not skip_next_bp and result.roll_dice_bp_met < len(result.roll_dice_task_breakpoints) - 1): # We haven't hit every roll dice breakpoint
+    next_dice_bp = result.next_roll_dice_bp
+    next_dice_bp_reward = result.roll_dice_task_reward[result.roll_dice_bp_met+1]
+    if next_dice_bp - values[SimResult.ROLLS_DONE] < next_dice_bp_reward:
+      difference = next_dice_bp - values[SimResult.ROLLS_DONE]
+      if (instrumentation is not None):
+        instrumentation.runs_chasing += 1
+      while (difference > 0 and (values[SimResult.INITIAL_DICE] < num_dice_rolls or values[SimResult.EXTRA_DICE] > 0)):
+        # get multiplier then check if it's allowed
+        num_turns = num_dice_rolls - values[SimResult.INITIAL_DICE] + values[SimResult.EXTRA_DICE]
+        multiplier = multipliers[values[SimResult.TILE]]
+        cap = scalar_chase_caps[num_turns if num_turns < max_capped_turns else max_capped_turns][difference if difference < max_capped_rolls else max_capped_rolls]
+        if (cap < multiplier):
+          multiplier = cap
+
+        # roll the dice, land on new tile and get the reward
+        if (instrumentation is not None):
+          instrumentation.record_multiplier('chase', multipliers[values[SimResult.TILE]], multiplier)
+          roll = compiled.instrumented_roll(multiplier, result, instrumentation)
+        else:
+          roll = compiled.roll(multiplier, result)
+        if (history is not None):
+          history.record(run, step, result, roll, multiplier)
+          step += 1
+        difference = next_dice_bp - values[SimResult.ROLLS_DONE]
+
+  if (instrumentation is not None):
+    instrumentation.phase_ns['chase'] += time.perf_counter_ns() - phase_start
+  return result
+
+# Number of turns left below which multipliers are capped, and the cap that applies under each
+turn_cap_thresholds = numpy.array([20, 30, 50, 100])
+# Rolls left to the next roll dice breakpoint below which multipliers are capped when chasing it
+roll_bp_cap_thresholds = numpy.array([2, 3, 4, 6])
+turn_caps = numpy.array([1, 2, 3, 5, numpy.iinfo(numpy.int64).max])
+# Multipliers the game lets us roll with
+multiplier_options = [1, 2, 3, 5, 10]
+# the cap for every number of turns left up to the last threshold, and when chasing for every number of rolls left up to the last
+# threshold too, so the engines look the cap up instead of going through the thresholds on every roll
+max_capped_turns = int(turn_cap_thresholds[-1])
+max_capped_rolls = int(roll_bp_cap_thresholds[-1])
+turn_cap_index = numpy.searchsorted(turn_cap_thresholds, numpy.arange(max_capped_turns + 1), side='right')
+turn_cap_table = turn_caps[turn_cap_index]
+chase_cap_table = turn_caps[numpy.minimum(turn_cap_index[:, None], numpy.searchsorted(roll_bp_cap_thresholds, numpy.arange(max_capped_rolls + 1), side='right')[None, :])]
+scalar_turn_caps = turn_cap_table.tolist()
+scalar_chase_caps = chase_cap_table.tolist()
+
+def simulate_batch_runs(board: list[Tile], multipliers: list[int], num_dice_rolls: int, points_to_meet: int, num_runs: int, prev_run: SimResult = None, skip_next_bp: bool = False, rng: numpy.random.Generator = None, history: RunHistory = None, control_variates: bool = False, policy: 'MultiplierPolicy' = None):
+  """Simulate many independent runs of going around the board at once. Gives the same statistics as calling simulate_single_run num_runs times.
+
+  Args:
+    board (list[Tile]): The board
+    multipliers (list[int]): The multipliers to apply when rolling from each tile
+    num_dice_rolls (int): Number of dice to start with. A run will stop if all of these dice are used.
+    points_to_meet (int): Number of points to aim for. A run will stop if we reach this threshold even if we didn't use all starting dice.
+    num_runs (int): Number of runs to simulate
+    prev_run (SimResult | BatchSimResult, optional): Previous run that every run starts from, or previous batch that each run continues from. Defaults to None.
+    rng (numpy.random.Generator | RandomTape, optional): Random number generator to use, or a tape to read the rolls from. Defaults to a freshly seeded one.
+    history (RunHistory, optional): Where to record the state of the sampled runs after every roll. Defaults to None to not record.
+    control_variates (bool, optional): Whether to track the control variates of every run in result.control_variates. Defaults to False.
+    policy (MultiplierPolicy, optional): Policy to pick the multiplier of every roll with until a run meets points_to_meet. The multipliers are still used to chase the next roll dice breakpoint. Defaults to None to only use the multipliers.
+
+  Returns:
+    BatchSimResult: Results of every run
+  """
+  if (policy is not None):
+    policy.check_goal(points_to_meet)
+    policy.check_board(board)
+  rng = rng if rng is not None else numpy.random.default_rng()
+  compiled = compile_board(board)
+  result = BatchSimResult(num_runs, prev_run, control_variates)
+  stats = result.stats
+  multipliers = numpy.asarray(multipliers)
+  if (history is not None):
+    sampled = history.samples(numpy.arange(num_runs))
+    steps = numpy.zeros(num_runs, dtype=numpy.int64)
+
+  def roll(rows, multiplier):
+    rolls = compiled.batch_roll(result, rows, multiplier, rng)
+    if (history is not None):
+      recorded = sampled[rows]
+      history.record_batch(rows[recorded], steps[rows[recorded]], result, rolls[recorded], multiplier[recorded])
+      steps[rows[recorded]] += 1
+
+  def turns_left(rows):
+    return num_dice_rolls - stats[Stat.INITIAL_DICE][rows] + stats[Stat.EXTRA_DICE][rows]
+
+  # runs drop out of active as soon as they meet the points or run out of dice
+  active = numpy.arange(num_runs)
+  active = active[(stats[Stat.POINTS] < points_to_meet) & (turns_left(active) > 0)]
+  while (len(active) > 0):
+    # get multiplier then check if it's allowed
+    turns = turns_left(active)
+    if (policy is not None):
+      multiplier = policy.batch_multiplier(stats[Stat.TILE][active], stats[Stat.POINTS][active], stats[Stat.ROLLS_DONE][active], turns)
+    else:
+      multiplier = numpy.minimum(multipliers[stats[Stat.TILE][active]], turn_cap_table[numpy.minimum(turns, max_capped_turns).astype(int)])
+    roll(active, multiplier)
+    active = active[(stats[Stat.POINTS][active] < points_to_meet) & (turns_left(active) > 0)]
+
+  if (not skip_next_bp):
+    # runs that haven't hit every roll dice breakpoint and are close enough to the next one to chase it
+    active = numpy.flatnonzero(result.roll_dice_bp_met < len(SimResult.roll_dice_task_breakpoints) - 1)
+    next_dice_bp = result.roll_dice_task_breakpoints[result.roll_dice_bp_met[active] + 1]
+    next_dice_bp_reward = numpy.diff(result.roll_dice_task_cum_reward)[result.roll_dice_bp_met[active] + 1]
+    chasing = next_dice_bp - stats[Stat.ROLLS_DONE][active] < next_dice_bp_reward
+    active, next_dice_bp = active[chasing], next_dice_bp[chasing]
+    while (True):
+      difference = next_dice_bp - stats[Stat.ROLLS_DONE][active]
+      chasing = (difference > 0) & ((stats[Stat.INITIAL_DICE][active] < num_dice_rolls) | (stats[Stat.EXTRA_DICE][active] > 0))
+      active, next_dice_bp, difference = active[chasing], next_dice_bp[chasing], difference[chasing]
+      if (len(active) == 0):
+        break
+      # get multiplier then check if it's allowed
+      cap = chase_cap_table[numpy.minimum(turns_left(active), max_capped_turns).astype(int), numpy.minimum(difference, max_capped_rolls)]
+      multiplier = numpy.minimum(multipliers[stats[Stat.TILE][active]], cap)
+      roll(active, multiplier)
+
+  return result
+
+def default_points_step(goal_points: int):
+  """Get the size of the points buckets to use for a goal when working out chances instead of simulating
+
+  Args:
+    goal_points (int): The number of points to aim for
+
+  Returns:
+    int: The smallest multiple of 50 that needs at most 400 buckets to reach the goal
+  """
+  return 50 * max(1, math.ceil(goal_points / 400 / 50))
+
+class SuccessRateSolver:
+  """Chance of meeting a points goal when rolling until we run out of dice, worked out with dynamic programming instead of simulating.
+
+  A state is the tile we are on, our points, the number of rolls done and the number of dice left. Rolling always adds to the
+  number of rolls done so we can work backwards one number of rolls at a time, each time getting the chance of success from every
+  tile, points bucket and number of dice left at once. Only the layers a roll can still reach are kept as we go down, plus a checkpoint
+  of that many layers every checkpoint_every rolls. Asking again from the same or fewer rolls done carries on from where we got to, and
+  asking from more rolls done carries on from the closest checkpoint above it instead of starting again from the top.
+  """
+  # most memory the checkpoints can take up. They are spread out further for bigger tables.
+  checkpoint_memory = 512 * 2**20
+
+  def __init__(self, board: list[Tile], multipliers: list[int], goal_points: int, max_dice: int, max_rolls: int, points_step: int = None):
+    """Create a solver for a board, multiplier map and points goal
+
+    Args:
+      board (list[Tile]): The board
+      multipliers (list[int]): The multipliers to apply when rolling from each tile
+      goal_points (int): The number of points to aim for
+      max_dice (int): Most dice left a state can have. Any dice won past this are dropped.
+      max_rolls (int): Number of rolls done after which a run that still hasn't met the goal counts as failed
+      points_step (int, optional): Points are tracked in buckets of this size. A reward that isn't a multiple of it is split between the two closest buckets so the expected points stay the same.
+        Every reward on the default board is a multiple of 50 so 50 is exact. Defaults to the smallest multiple of 50 that needs at most 400 buckets.
+    """
+    self.board = board
+    self.multipliers = multipliers
+    self.goal_points = goal_points
+    self.max_dice = max_dice
+    self.max_rolls = max_rolls
+    self.points_step = points_step if points_step else default_points_step(goal_points)
+    self.num_buckets = math.ceil(goal_points / self.points_step)
+    compiled = compile_board(board)
+    num_tiles = compiled.num_tiles
+    dice = numpy.arange(max_dice + 1)
+
+    # multiplier used from each tile with each number of dice left
+    self.tile_multipliers = numpy.minimum(numpy.asarray(multipliers)[:, None], turn_caps[numpy.searchsorted(turn_cap_thresholds, dice, side='right')])
+    self.multiplier_values = numpy.unique(self.tile_multipliers[:, 1:])
+    self.points_dice = compiled.get_points_dice(self.num_buckets, self.points_step, self.multiplier_values.max())
+
+    # the moves of each multiplier for every range of dice left where the same tiles use it. Moves from different tiles to the
+    # same (bucket shift, tile, dice change) are looked up once, and the chance of each one from every tile is kept in a
+    # (tile, move) matrix so adding up the moves of every tile is a single matrix product.
+    self.moves = []
+    for multiplier in self.multiplier_values:
+      uses = self.tile_multipliers == multiplier
+      uses[:, 0] = False
+      moves, move_chances = compiled.get_moves(multiplier, self.points_step)
+      # dice left where the tiles using the multiplier change
+      changes = numpy.flatnonzero((uses[:, 1:] != uses[:, :-1]).any(axis=0)) + 1
+      for low, high in zip(numpy.concatenate([[0], changes]), numpy.concatenate([changes, [max_dice + 1]])):
+        if (not uses[:, low].any()):
+          continue
+        keep = uses[moves[:, 0], low]
+        targets, target = numpy.unique(moves[keep, 1:], axis=0, return_inverse=True)
+        chances = numpy.zeros((num_tiles, len(targets)), dtype=numpy.float32)
+        numpy.add.at(chances, (moves[keep, 0], target.reshape(-1)), move_chances[keep])
+        # moves with the same bucket shift and dice change look up the same states, just on different tiles
+        groups = [(shift, dice_change, [new_tile for _, _, new_tile in group]) for (shift, dice_change), group in itertools.groupby(targets.tolist(), key=lambda target: target[:2])]
+        self.moves.append((int(multiplier), int(low), int(high), chances, groups))
+    # bucket and dice (before the dice change of the move) that moving up each number of buckets lands on from every bucket and number of dice left
+    self.shifted_states: dict[int, tuple] = {}
+
+    # chance of success from every state once the goal is met or the rolls run out
+    self.failed = numpy.zeros((num_tiles, self.num_buckets + 1, max_dice + 1), dtype=numpy.float32)
+    self.failed[:, self.num_buckets, :] = 1
+    self.layers: dict[int, numpy.ndarray] = {}
+    # layers from this many rolls done down have been worked out
+    self.lowest = max_rolls + 1
+    # how far up a roll reaches, so the layers needed to carry on down from a number of rolls done are the ones this far above it
+    self.reach = int(self.multiplier_values.max())
+    checkpoints = max(1, self.checkpoint_memory // (self.reach * self.failed.nbytes))
+    self.checkpoint_every = max(self.reach, math.ceil((max_rolls + 1) / checkpoints))
+
+  def get_shifted_states(self, shift: int):
+    """Get the bucket and dice left that moving up a number of buckets lands on, before the dice change of the move
+
+    Args:
+      shift (int): Number of buckets moved up
+
+    Returns:
+      tuple[numpy.ndarray, numpy.ndarray]: Where the new bucket of every bucket below the goal starts in a tile's flattened (bucket, dice left) table as a column,
+        and the dice left of every bucket and number of dice left counting any points breakpoint dice
+    """
+    if (shift not in self.shifted_states):
+      buckets = numpy.arange(self.num_buckets)
+      points_dice = self.points_dice[buckets + shift] - self.points_dice[buckets]
+      new_bucket = numpy.minimum(buckets + shift, self.num_buckets)
+      self.shifted_states[shift] = (new_bucket[:, None] * (self.max_dice + 1), (numpy.arange(self.max_dice + 1)[None, :] + points_dice[:, None]).astype(numpy.int32))
+    return self.shifted_states[shift]
+
+  def get_layer(self, rolls_done: int):
+    """Get the chance of success from every tile, points bucket and number of dice left after a number of rolls, working out any layers we don't have yet
+
+    Args:
+      rolls_done (int): The number of rolls done
+
+    Returns:
+      numpy.ndarray: Chance of success indexed by tile, points bucket and dice left
+    """
+    if (rolls_done > self.max_rolls):
+      return self.failed
+    if (rolls_done in self.layers):
+      return self.layers[rolls_done]
+    reach = self.reach
+    if (rolls_done > self.lowest):
+      # the layers it needs have been dropped, so carry on down from the closest checkpoint above and only keep the checkpoints
+      self.lowest = min(-(-rolls_done // self.checkpoint_every) * self.checkpoint_every, self.max_rolls + 1)
+      self.layers = { rolls: layer for rolls, layer in self.layers.items() if self.is_checkpoint(rolls) }
+    rolls_dice = SuccessRateSolver.rolls_dice
+    for rolls in range(self.lowest - 1, rolls_done - 1, -1):
+      layer = self.failed.copy()
+      for multiplier, low, high, chances, groups in self.moves:
+        next_layer = self.layers.get(rolls + multiplier, self.failed).reshape(len(self.failed), -1)
+        # dice rewarded from any roll dice task we meet on the way
+        reward = rolls_dice(rolls + multiplier) - rolls_dice(rolls)
+        values = numpy.empty((len(chances[0]), self.num_buckets, high - low), dtype=numpy.float32)
+        i = 0
+        for shift, dice_change, new_tiles in groups:
+          bucket_start, new_dice = self.get_shifted_states(shift)
+          # a move never costs more dice than we have, so only dice won past max_dice have to be dropped
+          index = numpy.minimum(new_dice[:, low:high] + (dice_change + reward), self.max_dice)
+          index += bucket_start
+          for new_tile in new_tiles:
+            numpy.take(next_layer[new_tile], index, out=values[i])
+            i += 1
+        layer[:, :self.num_buckets, low:high] += (chances @ values.reshape(len(values), -1)).reshape(-1, self.num_buckets, high - low)
+      self.layers[rolls] = layer
+      # the next layer can't reach this far up any more
+      if (not self.is_checkpoint(rolls + reach)):
+        self.layers.pop(rolls + reach, None)
+    self.lowest = rolls_done
+    return self.layers[rolls_done]
+
+  def is_checkpoint(self, rolls_done: int):
+    """Whether the layer of a number of rolls done is kept so we can carry on down from below it again later
+    """
+    return rolls_done % self.checkpoint_every < self.reach
+
+  @staticmethod
+  def rolls_dice(rolls_done: int):
+    """Get the total dice rewarded for the roll dice breakpoints met with this many rolls
+    """
+    return sum(reward for bp, reward in zip(SimResult.roll_dice_task_breakpoints, SimResult.roll_dice_task_reward) if rolls_done >= bp)
+
+  def success_probability(self, tile: int, points: int, rolls_done: int, dice_left: int):
+    """Get the chance of meeting the goal from a state when rolling until we run out of dice
+
+    Args:
+      tile (int): The tile we are on
+      points (int): The number of points we have
+      rolls_done (int): The number of rolls we have done
+      dice_left (int): The number of dice we have left, including free dice
+
+    Returns:
+      float: Chance of meeting the goal between 0 and 1
+    """
+    if (points >= self.goal_points):
+      return 1.0
+    if (dice_left <= 0):
+      return 0.0
+    if (dice_left > self.max_dice):
+      raise ValueError(f'The solver only covers up to {self.max_dice:,} dice left')
+    layer = self.get_layer(rolls_done)
+    # split points between the two closest buckets
+    bucket, remainder = divmod(points, self.points_step)
+    share = remainder / self.points_step
+    return float((1 - share) * layer[tile, bucket, dice_left] + share * layer[tile, min(bucket + 1, self.num_buckets), dice_left])
+
+# Solvers that have already been created so the layers they worked out can be shared across queries. Only the most recently
+# used few are kept since each one holds a window of layers.
+success_rate_solvers: OrderedDict[tuple, SuccessRateSolver] = OrderedDict()
+max_success_rate_solvers = 2
+
+def get_success_rate_solver(board: list[Tile], multipliers: list[int], goal_points: int, num_dice: int, rolls_done: int = 0, points_step: int = None):
+  """Get a solver that covers a query, reusing the one we already made for this board, multiplier map and goal if it is big enough
+
+  Args:
+    board (list[Tile]): The board
+    multipliers (list[int]): The multipliers to apply when rolling from each tile
+    goal_points (int): The number of points to aim for
+    num_dice (int): The number of dice left in the query
+    rolls_done (int, optional): The number of rolls done in the query. Defaults to 0.
+    points_step (int, optional): Size of the points buckets. Defaults to the solver default.
+
+  Returns:
+    SuccessRateSolver: The solver
+  """
+  if (num_dice == math.inf):
+    raise ValueError('The solver needs a finite number of dice')
+  # leave room for dice won along the way and stop counting well after a run would normally run out of dice
+  max_dice = num_dice + 40
+  max_rolls = rolls_done + 2 * num_dice + 60
+  key = (compile_board(board).fingerprint, tuple(multipliers), goal_points, points_step)
+  solver = success_rate_solvers.get(key)
+  if (solver is None or solver.max_dice < num_dice or solver.max_rolls < max_rolls):
+    if (solver is not None):
+      max_dice = max(max_dice, solver.max_dice)
+      max_rolls = max(max_rolls, solver.max_rolls)
+    solver = SuccessRateSolver(board, multipliers, goal_points, max_dice, max_rolls, points_step)
+    success_rate_solvers[key] = solver
+  success_rate_solvers.move_to_end(key)
+  while (len(success_rate_solvers) > max_success_rate_solvers):
+    success_rate_solvers.popitem(last=False)
+  return solver
+
+class MultiplierPolicy:
+  """Multiplier to roll with from every state to give the best chance of meeting a points goal, worked out once with value iteration
+  and kept as a table so the engines only have to look it up.
+
+  A state is the tile we are on, the points bucket we are in and the number of dice we can still spend. Points never go down so we
+  work backwards from the bucket just under the goal, but rolls that don't leave a bucket keep us in it so each bucket is iterated
+  until it settles. From every state we pick the allowed multiplier with the best chance of success, and then the one that leaves the
+  most dice once the goal is met. The dice we can still spend are the dice left plus the dice of the roll dice breakpoints we will
+  meet spending them, so how far we are from the next roll dice breakpoint is looked up with the number of rolls done when we roll.
+  """
+  def __init__(self, board: list[Tile], goal_points: int, max_dice: int, points_step: int = None, tolerance: float = 1e-5, table: numpy.ndarray = None, board_hash: str = None):
+    """Work out the policy for a board and points goal
+
+    Args:
+      board (list[Tile]): The board. None if a saved table and board_hash are passed instead.
+      goal_points (int): The number of points to aim for
+      max_dice (int): Most dice a state can have. Any dice won past this are dropped and states with more dice use the policy for this many.
+      points_step (int, optional): Points are tracked in buckets of this size. A reward that isn't a multiple of it is split between the two closest buckets.
+        Defaults to the smallest multiple of 50 that needs at most 400 buckets.
+      tolerance (float, optional): Most chance of success we give up in total to keep more dice. Defaults to 1e-5.
+      table (numpy.ndarray, optional): Table of a policy that was saved to use instead of working it out. Defaults to None.
+      board_hash (str, optional): Fingerprint hash of the board a saved table was worked out for. Defaults to None to take it from board.
+    """
+    self.board_hash = board_hash if board is None else compile_board(board).fingerprint_hash
+    self.goal_points = goal_points
+    self.max_dice = max_dice
+    self.points_step = points_step if points_step else default_points_step(goal_points)
+    self.tolerance = tolerance
+    self.num_buckets = math.ceil(goal_points / self.points_step)
+    self.table = table if table is not None else self.solve(board)
+    self.num_tiles = self.table.shape[1]
+
+    # dice we can still spend for every number of rolls done up to the last roll dice breakpoint and every number of dice left,
+    # counting the dice of every roll dice breakpoint that spending them meets, including the ones those dice meet
+    rolls = numpy.arange(SimResult.roll_dice_task_breakpoints[-1] + 1)
+    rolls_dice = BatchSimResult.roll_dice_task_cum_reward[numpy.searchsorted(SimResult.roll_dice_task_breakpoints, rolls, side='right')]
+    dice = numpy.arange(max_dice + 1)[None, :]
+    self.spendable_dice = dice
+    while (True):
+      spendable_dice = numpy.minimum(dice + rolls_dice[numpy.minimum(rolls[:, None] + self.spendable_dice, rolls[-1])] - rolls_dice[:, None], max_dice)
+      if ((spendable_dice == self.spendable_dice).all()):
+        break
+      self.spendable_dice = spendable_dice
+    self.max_rolls = int(rolls[-1])
+    # the same tables for the scalar engine where indexing numpy arrays is slow
+    self.scalar_table = self.table.tobytes()
+    self.scalar_spendable_dice = self.spendable_dice.tolist()
+
+  def solve(self, board: list[Tile]):
+    """Work out the multiplier of every state with value iteration
+
+    Returns:
+      numpy.ndarray: Multiplier indexed by points bucket, tile and dice we can still spend
+    """
+    compiled = compile_board(board)
+    num_tiles = compiled.num_tiles
+    max_dice = self.max_dice
+    dice = numpy.arange(max_dice + 1)
+    options = numpy.array(multiplier_options)
+    # multipliers allowed with each number of dice
+    allowed = options[:, None] <= turn_caps[numpy.searchsorted(turn_cap_thresholds, dice, side='right')][None, :]
+    allowed[:, 0] = False
+    points_dice = compiled.get_points_dice(self.num_buckets, self.points_step, options.max())
+
+    # the moves of each multiplier that stay in the bucket and the ones that leave it. Moves from different tiles to the same state
+    # are looked up once, and the chance of each one from every tile is kept in a (tile, move) matrix so adding up the moves of
+    # every tile is a single matrix product.
+    inner_moves, outer_moves = [], []
+    for multiplier in options:
+      moves, move_chances = compiled.get_moves(multiplier, self.points_step)
+      for inner in (True, False):
+        keep = (moves[:, 1] == 0) if inner else (moves[:, 1] > 0)
+        targets, target = numpy.unique(moves[keep, 1:], axis=0, return_inverse=True)
+        chances = numpy.zeros((num_tiles, len(targets)))
+        numpy.add.at(chances, (moves[keep, 0], target.reshape(-1)), move_chances[keep])
+        target_shift, target_tile, dice_change = targets.T
+        if (inner):
+          # index of the state every move lands on within the bucket
+          inner_moves.append((chances, target_tile[:, None] * (max_dice + 1) + numpy.clip(dice_change[:, None] + dice[None, :], 0, max_dice)))
+        else:
+          outer_moves.append((chances, target_shift, target_tile, dice_change[:, None] + dice[None, :]))
+
+    # chance of success plus the dice left once the goal is met, worth dice_value each, of every bucket, tile and number of dice
+    dice_value = self.tolerance / max_dice
+    values = numpy.zeros((self.num_buckets + 1, num_tiles, max_dice + 1))
+    values[self.num_buckets] = 1 + dice_value * dice
+    table = numpy.ones((self.num_buckets, num_tiles, max_dice + 1), dtype=numpy.uint8)
+    for bucket in range(self.num_buckets - 1, -1, -1):
+      outer_values = []
+      for chances, target_shift, target_tile, new_dice in outer_moves:
+        new_bucket = bucket + target_shift
+        new_dice = numpy.clip(new_dice + (points_dice[new_bucket] - points_dice[bucket])[:, None], 0, max_dice)
+        outer_values.append(chances @ values[numpy.minimum(new_bucket, self.num_buckets)[:, None], target_tile[:, None], new_dice])
+      # start from the bucket above since their values are close
+      current = values[bucket + 1].copy()
+      while (True):
+        flat = current.reshape(-1)
+        option_values = numpy.stack([outer_value + chances @ flat[index] for outer_value, (chances, index) in zip(outer_values, inner_moves)])
+        choice = numpy.where(allowed[:, None, :], option_values, -1).argmax(axis=0)
+        updated = numpy.take_along_axis(option_values, choice[None], axis=0)[0]
+        updated[:, 0] = 0
+        change = numpy.abs(updated - current).max()
+        current = updated
+        if (change < dice_value / 10):
+          break
+      values[bucket] = current
+      table[bucket] = options[choice]
+    return table
+
+  def check_goal(self, points_to_meet: int):
+    """Raise a ValueError if the policy wasn't worked out for this points goal
+    """
+    if (points_to_meet != self.goal_points):
+      raise ValueError(f'The policy was worked out for a goal of {self.goal_points:,} points, not {points_to_meet:,}')
+
+  def check_board(self, board: list[Tile]):
+    """Raise a ValueError if the policy wasn't worked out for this board
+    """
+    compiled = compile_board(board)
+    if (compiled.num_tiles != self.num_tiles):
+      raise ValueError(f'The policy was worked out for a board of {self.num_tiles} tiles, not {compiled.num_tiles}')
+    if (compiled.fingerprint_hash != self.board_hash):
+      raise ValueError('The policy was worked out for a different board')
+
+  def multiplier(self, tile: int, points: int, rolls_done: int, dice_left: int):
+    """Get the multiplier to roll with from a state that hasn't met the goal
+
+    Args:
+      tile (int): The tile we are on
+      points (int): The number of points we have
+      rolls_done (int): The number of rolls we have done
+      dice_left (int): The number of dice we have left, including free dice
+
+    Returns:
+      int: The multiplier
+    """
+    max_dice = self.max_dice
+    dice = self.scalar_spendable_dice[rolls_done if rolls_done < self.max_rolls else self.max_rolls][dice_left if dice_left < max_dice else max_dice]
+    multiplier = self.scalar_table[((points // self.points_step) * self.num_tiles + tile) * (max_dice + 1) + dice]
+    # we can spend more dice than we have, so the multiplier can still be capped by the dice we have
+    if (dice_left < max_capped_turns and scalar_turn_caps[dice_left] < multiplier):
+      multiplier = scalar_turn_caps[dice_left]
+    return multiplier
+
+  def batch_multiplier(self, tiles: numpy.ndarray, points: numpy.ndarray, rolls_done: numpy.ndarray, dice_left: numpy.ndarray):
+    """Get the multiplier to roll with from many states that haven't met the goal. Takes arrays of what multiplier takes.
+
+    Returns:
+      numpy.ndarray: The multipliers
+    """
+    dice = self.spendable_dice[numpy.minimum(rolls_done, self.max_rolls), numpy.minimum(dice_left, self.max_dice).astype(int)]
+    multipliers = self.table[points // self.points_step, tiles, dice]
+    return numpy.minimum(multipliers, turn_cap_table[numpy.minimum(dice_left, max_capped_turns).astype(int)])
+
+  def save(self, path: str):
+    """Save the table to a compressed npz file that load_policy can read
+    """
+    numpy.savez_compressed(path, table=self.table, goal_points=self.goal_points, points_step=self.points_step, tolerance=self.tolerance, board_hash=self.board_hash)
+
+def load_policy(path: str, board: list[Tile] = None):
+  """Load a policy saved with MultiplierPolicy.save
+
+  Args:
+    path (str): The npz file
+    board (list[Tile], optional): Board the policy will be used on. Raises a ValueError if the policy was worked out for another board. Defaults to None to not check.
+
+  Returns:
+    MultiplierPolicy: The policy
+  """
+  with numpy.load(path) as data:
+    if ('board_hash' not in data):
+      raise ValueError(f"{path} doesn't say which board it was worked out for. Work it out again with the policy command")
+    table = data['table']
+    policy = MultiplierPolicy(None, int(data['goal_points']), table.shape[2] - 1, int(data['points_step']), float(data['tolerance']), table, str(data['board_hash']))
+  if (board is not None):
+    policy.check_board(board)
+  return policy
+
+# Policies that have already been worked out, so each board and goal is only worked out once
+multiplier_policies: dict[tuple, MultiplierPolicy] = {}
+
+def get_multiplier_policy(board: list[Tile], goal_points: int, num_dice: int, points_step: int = None):
+  """Get the policy of a board and goal, reusing the one we already worked out if it covers enough dice
+
+  Args:
+    board (list[Tile]): The board
+    goal_points (int): The number of points to aim for
+    num_dice (int): The most dice a run starts with
+    points_step (int, optional): Size of the points buckets. Defaults to the policy default.
+
+  Returns:
+    MultiplierPolicy: The policy
+  """
+  if (goal_points == math.inf or num_dice == math.inf):
+    raise ValueError('The policy needs a finite points goal and number of dice')
+  # leave room for the dice of every roll dice breakpoint and dice won along the way
+  max_dice = num_dice + sum(SimResult.roll_dice_task_reward) + 40
+  key = (compile_board(board).fingerprint, goal_points, points_step)
+  policy = multiplier_policies.get(key)
+  if (policy is None or policy.max_dice < max_dice):
+    policy = MultiplierPolicy(board, goal_points, max_dice, points_step)
+    multiplier_policies[key] = policy
+  return policy
+
+class MultiplierOptimizer:
+  """Search every multiplier map of a board for the one with the best PPID or success rate.
+
+  A map is scored by simulating it with the batch engine. Every map replays the same RandomTape, so two maps are compared on
+  the exact same dice rolls and the noise mostly cancels out. Scores are cached so a map is never simulated twice.
+  """
+  def __init__(self, board: list[Tile], num_dice: int, points_to_meet: int, objective: str = 'ppid', num_rounds: int = 5000, seed: int = None):
+    """Create an optimizer
+
+    Args:
+      board (list[Tile]): The board
+      num_dice (int): Number of dice to start each round with
+      points_to_meet (int): Number of points to aim for
+      objective (str, optional): 'ppid' or 'success_rate' of meeting points_to_meet. Defaults to 'ppid'.
+      num_rounds (int, optional): Number of rounds to score every map with. Defaults to 5000.
+      seed (int, optional): Seed of the tape every map is scored with. Defaults to None.
+    """
+    if (objective not in ('ppid', 'success_rate')):
+      raise ValueError(f'Unknown objective {objective}')
+    if (objective == 'success_rate' and points_to_meet == math.inf):
+      raise ValueError('Need a points goal to optimize the success rate')
+    self.board = compile_board(board)
+    self.num_dice = num_dice
+    self.points_to_meet = points_to_meet
+    self.objective = objective
+    self.num_rounds = num_rounds
+    self.tape = RandomTape(num_rounds, seed)
+    self.rng = numpy.random.default_rng(seed)
+    self.scores: dict[tuple, float] = {}
+
+  def score(self, multipliers: list[int]):
+    """Score a multiplier map
+
+    Args:
+      multipliers (list[int]): The multipliers to apply when rolling from each tile
+
+    Returns:
+      float: PPID or success rate of the map
+    """
+    key = tuple(multipliers)
+    if (key not in self.scores):
+      self.tape.rewind()
+      result = simulate_batch_runs(self.board, multipliers, self.num_dice, self.points_to_meet, self.num_rounds, rng=self.tape)
+      stats = result.stats
+      if (self.objective == 'ppid'):
+        self.scores[key] = float(stats[Stat.POINTS].sum() / (stats[Stat.INITIAL_DICE].sum() - stats[Stat.EXTRA_DICE].sum()))
+      else:
+        self.scores[key] = float((stats[Stat.POINTS] >= self.points_to_meet).mean())
+    return self.scores[key]
+
+  def local_search(self, start: list[int] = None, max_passes: int = 10, verbose: bool = False):
+    """Change one tile at a time to any other multiplier, keeping the change whenever it scores better, until a pass over every tile changes nothing
+
+    Args:
+      start (list[int], optional): Map to start from. Defaults to calc_best_multipliers(board, 10).
+      max_passes (int, optional): Most passes over the board to do. Defaults to 10.
+      verbose (bool, optional): Whether to print every improvement. Defaults to False.
+
+    Returns:
+      tuple[list[int], float]: The best map found and its score
+    """
+    best = list(start) if start is not None else calc_best_multipliers(self.board, 10)
+    best_score = self.score(best)
+    for _ in range(max_passes):
+      improved = False
+      for tile in range(len(best)):
+        for multiplier in multiplier_options:
+          if (multiplier == best[tile]):
+            continue
+          candidate = best.copy()
+          candidate[tile] = multiplier
+          candidate_score = self.score(candidate)
+          if (candidate_score > best_score):
+            best, best_score, improved = candidate, candidate_score, True
+            if verbose:
+              print(f"{best_score:.4f}: {best}")
+      if (not improved):
+        break
+    return best, best_score
+
+  def cross_entropy(self, iterations: int = 30, population: int = 50, elite_fraction: float = 0.2, smoothing: float = 0.7, start: list[int] = None, verbose: bool = False):
+    """Cross-entropy method. Keeps a chance of every multiplier for every tile, samples maps from it and moves the chances towards the best scoring maps.
+
+    Args:
+      iterations (int, optional): Number of times to sample a population. Defaults to 30.
+      population (int, optional): Number of maps to sample each time. Defaults to 50.
+      elite_fraction (float, optional): Share of the best maps that the chances move towards. Defaults to 0.2.
+      smoothing (float, optional): How far the chances move towards the best maps each time, between 0 and 1. Defaults to 0.7.
+      start (list[int], optional): Map to favour at the start. Defaults to None to start from even chances.
+      verbose (bool, optional): Whether to print the best map of every iteration. Defaults to False.
+
+    Returns:
+      tuple[list[int], float]: The best map found and its score
+    """
+    options = numpy.array(multiplier_options)
+    chances = numpy.full((self.board.num_tiles, len(options)), 1 / len(options))
+    if (start is not None):
+      chances = 0.5 * chances + 0.5 * (options[None, :] == numpy.array(start)[:, None])
+    num_elite = max(1, int(population * elite_fraction))
+    best, best_score = None, -math.inf
+    for i in range(iterations):
+      # sample a multiplier index for every tile of every map
+      cum_chances = numpy.cumsum(chances, axis=1)
+      picks = (self.rng.random((population, self.board.num_tiles, 1)) >= cum_chances[None, :, :]).sum(axis=2)
+      picks = numpy.minimum(picks, len(options) - 1)
+      scores = numpy.array([self.score(options[pick].tolist()) for pick in picks])
+      elite = picks[numpy.argsort(scores)[::-1][:num_elite]]
+      if (scores.max() > best_score):
+        best, best_score = options[picks[scores.argmax()]].tolist(), float(scores.max())
+      elite_chances = (elite[:, :, None] == numpy.arange(len(options))[None, None, :]).mean(axis=0)
+      chances = smoothing * elite_chances + (1 - smoothing) * chances
+      if verbose:
+        print(f"Iteration {i+1}: {best_score:.4f}: {best}")
+      if (chances.max(axis=1).min() > 0.99):
+        break
+    return best, best_score
+
+def optimize_multipliers(board: list[Tile], num_dice: int, points_to_meet: int, objective: str = 'ppid', method: str = 'local', num_rounds: int = 5000, start: list[int] = None, seed: int = None, verbose: bool = True):
+  """Search for the best multiplier map of a board, taking into account everything the simulation does (multiplier caps, breakpoint dice, roll dice tasks)
+
+  Args:
+    board (list[Tile]): The board
+    num_dice (int): Number of dice to start each round with
+    points_to_meet (int): Number of points to aim for
+    objective (str, optional): 'ppid' or 'success_rate' of meeting points_to_meet. Defaults to 'ppid'.
+    method (str, optional): 'local' for local search, 'cross_entropy' for the cross-entropy method, or 'both' to polish the cross-entropy result with local search. Defaults to 'local'.
+    num_rounds (int, optional): Number of rounds to score every map with. Defaults to 5000.
+    start (list[int], optional): Map to start from. Defaults to None.
+    seed (int, optional): Seed of the rounds every map is scored with. Defaults to None.
+    verbose (bool, optional): Whether to print progress. Defaults to True.
+
+  Returns:
+    list[int]: The best multipliers to apply when rolling from each tile of the board
+  """
+  optimizer = MultiplierOptimizer(board, num_dice, points_to_meet, objective, num_rounds, seed)
+  if (method == 'local'):
+    best, best_score = optimizer.local_search(start, verbose=verbose)
+  elif (method == 'cross_entropy'):
+    best, best_score = optimizer.cross_entropy(start=start, verbose=verbose)
+  elif (method == 'both'):
+    best, _ = optimizer.cross_entropy(start=start, verbose=verbose)
+    best, best_score = optimizer.local_search(best, verbose=verbose)
+  else:
+    raise ValueError(f'Unknown method {method}')
+  if verbose:
+    print(f"Best {objective}: {best_score:.4f} after scoring {len(optimizer.scores):,} maps")
+    print(f"Multipliers: {best}")
+  return best
+
+def add_round_to_dataset(dataset, stats):
+  """Add a simulation round stats to the dataset that will later be transformed into a pandas DataFrame
+
+  Args:
+      dataset (dict): dataset to add to
+      stats (dict): simulation stats to add
+  """
+  for s in Stat:
+    if (s in dataset):
+      dataset[s].append(stats[s])
+    else:
+      dataset[s] = [stats[s]]
+
+def add_batch_to_dataset(dataset, stats):
+  """Add the stats of a batch of simulation rounds to the dataset that will later be transformed into a pandas DataFrame
+
+  Args:
+      dataset (dict): dataset to add to
+      stats (dict): stats of the batch to add. Every stat is a numpy array with one entry per round
+  """
+  for s in Stat:
+    if (s in dataset):
+      dataset[s] = numpy.concatenate((dataset[s], stats[s]))
+    else:
+      dataset[s] = stats[s]
+
+def add_stats_to_round(stats1, stats2):
+  """Add up stats across multipler rounds
+  
+  Args:
+      stats1 (dict): simulation stats to add
+      stats2 (dict): simulation stats to add
+  
+  """
+  cum_stats = {}
+  for stat in Stat:
+    num1 = stats1[stat] if stat in stats1 else 0
+    num2 = stats2[stat] if stat in stats2 else 0
+    if stat == Stat.TILE:
+      cum_stats[stat] = num2
+      continue
+    cum_stats[stat] = num1 + num2
+  return cum_stats
+    
+
+def split_rounds(num_rounds: int, workers: int):
+  """Split rounds into shards. Every shard is at most 10,000 rounds and there are enough shards to keep every worker busy.
+
+  Args:
+    num_rounds (int): The number of rounds to split
+    workers (int): The number of workers that will run the shards
+
+  Returns:
+    list[int]: Number of rounds in each shard
+  """
+  shard_size = max(1, min(10000, math.ceil(num_rounds / workers)))
+  return [min(shard_size, num_rounds - i) for i in range(0, num_rounds, shard_size)]
+
+def seed_random(seed: numpy.random.SeedSequence):
+  """Seed the random module used by the scalar engine from a seed sequence
+
+  Args:
+    seed (numpy.random.SeedSequence): Seed of the random stream
+  """
+  random.seed(seed.generate_state(4).tobytes())
+
+def simulate_rounds(board: list[Tile], multipliers: list[int], num_dice_rolls: int, points_to_meet: int, engine: str, variance_reduction: list[str], policy: MultiplierPolicy, keep_rounds: bool, history_every: int, history_capacity: int, history_directory: str, num_rounds: int, seed: numpy.random.SeedSequence, first_run: int = 0):
+  """Simulate a shard of rounds using its own random stream. This is what every worker of the process pool runs.
+
+  Args:
+    board (list[Tile]): The board
+    multipliers (list[int]): The multipliers to apply when rolling from each tile
+    num_dice_rolls (int): Number of dice to start each round with
+    points_to_meet (int): Number of points to aim for
+    engine (str): 'scalar' or 'batch'
+    variance_reduction (list[str]): Variance reduction methods to simulate with on the batch engine. See VarianceReducedEstimate.
+    policy (MultiplierPolicy): Policy to pick the multipliers with until the points are met. None to only use the multipliers.
+    keep_rounds (bool): Whether to keep every round in a dataset as well as accumulating them
+    history_every (int): Record the state after every roll of every this many rounds. 0 to not record.
+    history_capacity (int): Number of rolls of history to hold in memory. None to grow as needed.
+    history_directory (str): Directory of the history the shard's history will be merged into. The shard writes its rolls to a folder of its own in it
+      whenever it holds history_capacity rolls. None to keep only the latest rolls, like the history it is merged into.
+    num_rounds (int): The number of rounds to simulate
+    seed (numpy.random.SeedSequence): Seed of the random stream for this shard
+    first_run (int, optional): Index of the first round of this shard among every round, so the same rounds get their history recorded however the rounds are split. Defaults to 0.
+
+  Returns:
+    tuple[StatsAccumulator, dict, RunHistory]: accumulated stats of the shard, dataset of the shard or None if we are not keeping rounds, history of the shard or None if we are not recording
+  """
+  accumulator = StatsAccumulator(points_to_meet)
+  dataset = {} if keep_rounds else None
+  # the shard's history is bounded the same way as the history it is merged into, so no process holds more rolls than that
+  history = None
+  if (history_every):
+    history = RunHistory(history_every, history_capacity, os.path.join(history_directory, f'shard_{first_run}') if history_directory is not None else None, first_run)
+  if (engine == 'batch'):
+    rng = numpy.random.default_rng(seed)
+    if ('antithetic' in variance_reduction or 'stratified' in variance_reduction):
+      rng = RandomTape(num_rounds, seed, antithetic='antithetic' in variance_reduction, stratified='stratified' in variance_reduction)
+    result = simulate_batch_runs(board, multipliers, num_dice_rolls, points_to_meet, num_rounds, rng=rng, history=history, control_variates='control_variates' in variance_reduction, policy=policy)
+    accumulator.add_batch(result.stats)
+    if (variance_reduction):
+      accumulator.variance_reduced = VarianceReducedEstimate(variance_reduction)
+      accumulator.variance_reduced.add_batch(result)
+    if (keep_rounds):
+      add_batch_to_dataset(dataset, result.stats)
+  else:
+    seed_random(seed)
+    for i in range(num_rounds):
+      result = simulate_single_run(board, multipliers, num_dice_rolls, points_to_meet, history=history if history and history.samples(i) else None, run=i, policy=policy)
+      accumulator.add(result.stats)
+      if (keep_rounds):
+        add_round_to_dataset(dataset, result.stats)
+  accumulator.flush()
+  if (history is not None):
+    # the rolls go back in files rather than with the shard
+    history.close()
+  return accumulator, dataset, history
+
+def measure_variance_reduction(board: list[Tile], multipliers: list[int], num_dice_rolls: int, points_to_meet: int, num_rounds: int = 10000, repeats: int = 20, seed: int = None):
+  """Measure how much each variance reduction method actually helps. Every method estimates the PPID from num_rounds rounds
+  repeats times with different seeds, and the spread of those estimates is compared to that of plain rounds.
+
+  Args:
+    board (list[Tile]): The board
+    multipliers (list[int]): The multipliers to apply when rolling from each tile
+    num_dice_rolls (int): Number of dice to start each round with
+    points_to_meet (int): Number of points to aim for
+    num_rounds (int, optional): Number of rounds of every estimate. Defaults to 10000.
+    repeats (int, optional): Number of estimates of every method. Defaults to 20.
+    seed (int, optional): Seed for the random streams. Defaults to None.
+
+  Returns:
+    dict: For every method, the mean and standard deviation of its estimates, how many times less variance they have than plain rounds
+      and how many times less the standard error of the estimates says they have
+  """
+  methods = [[]] + [[method] for method in VarianceReducedEstimate.known_methods] + [VarianceReducedEstimate.known_methods]
+  results = {}
+  print(f"{'method':40} {'mean PPID':>10} {'std':>8} {'measured':>9} {'reported':>9}")
+  for i, variance_reduction in enumerate(methods):
+    estimates = []
+    reported = []
+    for j in range(repeats):
+      accumulator, _, _ = simulate_rounds(board, multipliers, num_dice_rolls, points_to_meet, 'batch', variance_reduction, None, False, 0, None, None, num_rounds, numpy.random.SeedSequence(seed, spawn_key=(i, j)))
+      estimate = accumulator.variance_reduced
+      estimates.append(estimate.ppid() if estimate is not None else accumulator.ppid())
+      reported.append((accumulator.ppid_standard_error() / estimate.ppid_standard_error()) ** 2 if estimate is not None else 1.0)
+    label = ', '.join(variance_reduction) or 'plain'
+    results[label] = { 'ppid': float(numpy.mean(estimates)), 'std': float(numpy.std(estimates, ddof=1)), 'reported_reduction': float(numpy.mean(reported)) }
+    results[label]['reduction'] = (results['plain']['std'] / results[label]['std']) ** 2
+    print(f"{label:40} {results[label]['ppid']:>10.3f} {results[label]['std']:>8.3f} {results[label]['reduction']:>8.1f}x {results[label]['reported_reduction']:>8.1f}x")
+  return results
+
+def collect_shards(shards: list, shard_sizes: list[int], done: int = 0, write=None, history: RunHistory = None):
+  """Merge the results of shards in order while reporting progress every 10,000 rounds
+
+  Args:
+    shards (list): (StatsAccumulator, dataset, RunHistory) of every shard, or futures that will resolve to them
+    shard_sizes (list[int]): Number of rounds in each shard
+    done (int, optional): Number of rounds already merged in, for progress reporting. Defaults to 0.
+    write (function, optional): Called with the dataset of every shard as it comes in instead of merging them. Defaults to None.
+    history (RunHistory, optional): History to merge the history of every shard into. Defaults to None.
+
+  Returns:
+    tuple[StatsAccumulator, dict]: Merged accumulated stats, merged dataset or None if the shards didn't keep rounds or were written
+  """
+  accumulator = StatsAccumulator()
+  dataset = None
+  for i, (shard, shard_size) in enumerate(zip(shards, shard_sizes)):
+    shard_accumulator, shard_dataset, shard_history = shard.result() if isinstance(shard, Future) else shard
+    if (isinstance(shards, list)):
+      # let go of the shard's results once they are merged or written
+      shards[i] = shard = None
+    accumulator.merge(shard_accumulator)
+    if (history is not None and shard_history is not None):
+      history.merge(shard_history, run_offset=done)
+    if (write is not None):
+      write(shard_dataset)
+    elif (shard_dataset is not None):
+      dataset = dataset if dataset is not None else {}
+      add_batch_to_dataset(dataset, shard_dataset)
+    for i in range(done // 10000, (done + shard_size) // 10000):
+      print(f'{(i+1)*10000} sims done')
+    done += shard_size
+  return accumulator, dataset
+
+def submit_shards(executor: ProcessPoolExecutor, fn, args: tuple, num_rounds: int, workers: int, seed: numpy.random.SeedSequence, first_run: int = None):
+  """Split rounds into shards and run them on the process pool, or right away if there is no pool
+
+  Args:
+    executor (ProcessPoolExecutor): The process pool. None to run the shards in this process.
+    fn (function): Function that simulates a shard. Called with *args, the number of rounds in the shard, the shard seed, and the index of its first round if first_run is set.
+    args (tuple): Arguments to pass to fn
+    num_rounds (int): The number of rounds to split up
+    workers (int): The number of workers
+    seed (numpy.random.SeedSequence): Seed that every shard seed is spawned from
+    first_run (int, optional): Index of the first of the rounds. Defaults to None to not pass shards the index of their first round.
+
+  Returns:
+    tuple[list, list[int]]: Datasets or futures of every shard, number of rounds in each shard
+  """
+  shard_sizes = split_rounds(num_rounds, workers)
+  shard_seeds = seed.spawn(len(shard_sizes))
+  shard_args = [(shard_size, shard_seed) for shard_size, shard_seed in zip(shard_sizes, shard_seeds)]
+  if (first_run is not None):
+    shard_args = [shard + (first_run + shard_first_run,) for shard, shard_first_run in zip(shard_args, itertools.accumulate(shard_sizes, initial=0))]
+  if (executor is None):
+    # run lazily so progress is reported as we go
+    shards = (fn(*args, *shard) for shard in shard_args)
+  else:
+    shards = [executor.submit(fn, *args, *shard) for shard in shard_args]
+  return shards, shard_sizes
+
+class Checkpoint:
+  """Rounds of a labelled run saved to a directory in chunks, so a long run can be stopped and resumed or have more rounds added later.
+
+  Every chunk is a compressed npz file with one int32 column per stat. manifest.json lists the chunks along with the seed of the
+  random stream each one used, and the settings of the run so we never mix rounds of different runs. The next chunk always uses a
+  seed spawned from the run's entropy with the chunk number, so a run that is stopped and resumed gets the same rounds as one that
+  ran in one go.
+  """
+  def __init__(self, directory: str, config: dict = None, seed: int = None):
+    """Open the checkpoint in a directory, creating it if it doesn't exist
+
+    Args:
+      directory (str): Directory of the checkpoint
+      config (dict, optional): Settings of the run. Resuming with different settings raises a ValueError. Defaults to None to open an existing checkpoint with any settings.
+      seed (int, optional): Seed for the random streams of a new checkpoint. An existing checkpoint keeps its own. Defaults to None.
+    """
+    self.directory = directory
+    self.manifest_path = os.path.join(directory, 'manifest.json')
+    if (os.path.exists(self.manifest_path)):
+      with open(self.manifest_path) as file:
+        self.manifest = json.load(file)
+      if (config is not None and self.manifest['config'] != json.loads(json.dumps(config))):
+        raise ValueError(f"Checkpoint {directory} was saved with {self.manifest['config']}, not {config}")
+    elif (config is None):
+      raise FileNotFoundError(f'No checkpoint in {directory}')
+    else:
+      os.makedirs(directory, exist_ok=True)
+      self.manifest = { 'config': config, 'entropy': numpy.random.SeedSequence(seed).entropy, 'chunks': [] }
+      self.save_manifest()
+
+  @property
+  def rounds(self):
+    """Number of rounds saved
+    """
+    return sum(chunk['rounds'] for chunk in self.manifest['chunks'])
+
+  def save_manifest(self):
+    # write to a temporary file first so stopping part way never leaves a broken manifest
+    temporary_path = self.manifest_path + '.tmp'
+    with open(temporary_path, 'w') as file:
+      json.dump(self.manifest, file, indent=2)
+    os.replace(temporary_path, self.manifest_path)
+
+  def next_seed(self):
+    """Seed of the random stream for the next chunk
+
+    Returns:
+      numpy.random.SeedSequence: The seed
+    """
+    return numpy.random.SeedSequence(self.manifest['entropy'], spawn_key=(len(self.manifest['chunks']),))
+
+  def add_chunk(self, dataset: dict, seed: numpy.random.SeedSequence):
+    """Save a chunk of rounds
+
+    Args:
+      dataset (dict): Stats of the rounds. Every stat is a numpy array with one entry per round.
+      seed (numpy.random.SeedSequence): Seed of the random stream the rounds used
+    """
+    file_name = f"chunk_{len(self.manifest['chunks']):05d}.npz"
+    numpy.savez_compressed(os.path.join(self.directory, file_name), **{ stat.name: numpy.asarray(dataset[stat], dtype=numpy.int32) for stat in Stat })
+    self.manifest['chunks'].append({ 'file': file_name, 'rounds': len(dataset[Stat.POINTS]), 'entropy': seed.entropy, 'spawn_key': list(seed.spawn_key) })
+    self.save_manifest()
+
+  def chunks(self):
+    """Load every saved chunk one at a time
+
+    Yields:
+      dict: Stats of the rounds of a chunk. Every stat is a numpy array with one entry per round.
+    """
+    for chunk in self.manifest['chunks']:
+      with numpy.load(os.path.join(self.directory, chunk['file'])) as data:
+        yield { stat: data[stat.name].astype(numpy.int64) for stat in Stat }
+
+  def merge(self, other: 'Checkpoint'):
+    """Add the rounds of another checkpoint of the same run, e.g. one run on another machine with a different seed
+
+    Args:
+      other (Checkpoint): Checkpoint to take the rounds of
+    """
+    if (other.manifest['config'] != self.manifest['config']):
+      raise ValueError(f"Can't merge rounds of {other.manifest['config']} into {self.manifest['config']}")
+    seeds = { (chunk['entropy'], tuple(chunk['spawn_key'])) for chunk in self.manifest['chunks'] }
+    for chunk in other.manifest['chunks']:
+      if ((chunk['entropy'], tuple(chunk['spawn_key'])) in seeds):
+        raise ValueError(f"{other.directory} has a chunk with the same seed as {self.directory}, so its rounds aren't independent")
+    for chunk in other.manifest['chunks']:
+      file_name = f"chunk_{len(self.manifest['chunks']):05d}.npz"
+      shutil.copyfile(os.path.join(other.directory, chunk['file']), os.path.join(self.directory, file_name))
+      self.manifest['chunks'].append({ **chunk, 'file': file_name })
+      self.save_manifest()
+
+def merge_checkpoints(directory: str, other_directory: str):
+  """Add the rounds of every labelled run saved in one checkpoint directory to the same runs saved in another
+
+  Args:
+    directory (str): Checkpoint directory to add the rounds to
+    other_directory (str): Checkpoint directory to take the rounds from
+  """
+  for root, _, files in os.walk(other_directory):
+    if ('manifest.json' in files):
+      other = Checkpoint(root)
+      checkpoint = Checkpoint(os.path.join(directory, os.path.relpath(root, other_directory)), other.manifest['config'])
+      checkpoint.merge(other)
+      print(f'{checkpoint.directory} has {checkpoint.rounds:,} rounds')
+
+class RoundsWriter:
+  """Writes simulation rounds to a file a chunk at a time as they finish, so the rounds never all have to be in memory.
+
+  Columns are the lowercase stat names (points, rolls_done, ...) as integers, plus the label of the multiplier map and the
+  starting dice. 'csv' gives a plain CSV. 'parquet' gives a typed columnar file where the label is dictionary encoded and any
+  column can be loaded on its own. It needs pyarrow.
+  """
+  formats = ['csv', 'parquet']
+
+  def __init__(self, path: str, output_format: str = 'csv'):
+    """Create the file to write to
+
+    Args:
+      path (str): Path of the file
+      output_format (str, optional): 'csv' or 'parquet'. Defaults to 'csv'.
+    """
+    if (output_format not in self.formats):
+      raise ValueError(f'Unknown output format {output_format}')
+    self.path = path
+    self.output_format = output_format
+    self.parquet_writer = None
+    self.rows = 0
+    if (output_format == 'parquet'):
+      try:
+        import pyarrow
+        import pyarrow.parquet
+      except ImportError:
+        raise ImportError("output_format='parquet' needs pyarrow. Install it with `pip install pyarrow` or use output_format='csv'.")
+      self.pyarrow = pyarrow
+      self.schema = pyarrow.schema(
+        [('label', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())), ('starting_dice', pyarrow.float64())] +
+        [(stat.name.lower(), pyarrow.int64()) for stat in Stat]
+      )
+      self.parquet_writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+    else:
+      import pandas
+      self.pandas = pandas
+      # start with just the header so a file is there even if no rounds are written
+      pandas.DataFrame(columns=['label', 'starting_dice'] + [stat.name.lower() for stat in Stat]).to_csv(path, index=False)
+
+  def write(self, dataset: dict, label: str, num_dice: int):
+    """Add rounds to the end of the file
+
+    Args:
+      dataset (dict): Stats of the rounds. Every stat is a list or numpy array with one entry per round.
+      label (str): Label of the multiplier map the rounds used
+      num_dice (int): Number of dice the rounds started with. Stored as a float so infinite dice is math.inf.
+    """
+    num_rounds = len(dataset[Stat.POINTS])
+    if (num_rounds == 0):
+      return
+    columns = { stat.name.lower(): numpy.asarray(dataset[stat], dtype=numpy.int64) for stat in Stat }
+    if (self.parquet_writer is not None):
+      pyarrow = self.pyarrow
+      table = pyarrow.table({
+        'label': pyarrow.DictionaryArray.from_arrays(numpy.zeros(num_rounds, dtype=numpy.int32), [label]),
+        'starting_dice': numpy.full(num_rounds, num_dice, dtype=float),
+        **columns,
+      }, schema=self.schema)
+      self.parquet_writer.write_table(table)
+    else:
+      df = self.pandas.DataFrame({ 'label': label, 'starting_dice': num_dice, **columns })
+      df.to_csv(self.path, mode='a', header=False, index=False)
+    self.rows += num_rounds
+
+  def close(self):
+    if (self.parquet_writer is not None):
+      self.parquet_writer.close()
+      self.parquet_writer = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+def simulate_in_chunks(executor: ProcessPoolExecutor, args: tuple, num_rounds: int, workers: int, seed: numpy.random.SeedSequence, chunk_size: int, write=None, target_error: float = None, target: str = 'ppid', checkpoint: Checkpoint = None, history: RunHistory = None):
+  """Simulate rounds chunk_size at a time, stopping early once the target is precise enough and saving every chunk to a checkpoint
+
+  Args:
+    executor (ProcessPoolExecutor): The process pool. None to run in this process.
+    args (tuple): Arguments to pass to simulate_rounds before keep_rounds and the history settings
+    num_rounds (int): The number of rounds to simulate, including any already saved to the checkpoint
+    workers (int): The number of workers
+    seed (numpy.random.SeedSequence): Seed that the seed of every chunk is spawned from when there is no checkpoint
+    chunk_size (int): Number of rounds in each chunk
+    write (function, optional): Called with the dataset of every chunk, including any already saved to the checkpoint. Defaults to None.
+    target_error (float, optional): Stop once the 95% confidence interval of the target is within this much of it. Defaults to None to run num_rounds.
+    target (str, optional): 'ppid' or 'success_rate'. Defaults to 'ppid'.
+    checkpoint (Checkpoint, optional): Checkpoint to resume from and save every chunk to. Defaults to None.
+    history (RunHistory, optional): History to record the rounds simulated in. Rounds loaded from the checkpoint have no history. Defaults to None.
+
+  Returns:
+    StatsAccumulator: accumulated stats
+  """
+  points_to_meet = args[3]
+  accumulator = StatsAccumulator(points_to_meet)
+  if (checkpoint is not None and checkpoint.rounds > 0):
+    for chunk in checkpoint.chunks():
+      accumulator.add_batch(chunk)
+      if (write is not None):
+        write(chunk)
+    print('Resuming from {:,} saved rounds'.format(accumulator.count))
+
+  def converged():
+    return target_error is not None and accumulator.relative_error(target) <= target_error
+
+  chunk = 0
+  while (accumulator.count < num_rounds and not converged()):
+    chunk_seed = checkpoint.next_seed() if checkpoint is not None else numpy.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (chunk,))
+    shards, shard_sizes = submit_shards(executor, simulate_rounds, args + (write is not None or checkpoint is not None, history.every if history else 0, history.capacity if history else None, history.directory if history else None), min(chunk_size, num_rounds - accumulator.count), workers, chunk_seed, accumulator.count)
+    # the chunk has to be put together to save it, otherwise each shard can be written as it comes in
+    chunk_accumulator, chunk_dataset = collect_shards(shards, shard_sizes, accumulator.count, write if checkpoint is None else None, history)
+    if (checkpoint is not None):
+      checkpoint.add_chunk(chunk_dataset, chunk_seed)
+      if (write is not None):
+        write(chunk_dataset)
+    accumulator.merge(chunk_accumulator)
+    chunk += 1
+
+  if (target_error is not None):
+    if (converged()):
+      print('Converged after {:,} rounds'.format(accumulator.count))
+    else:
+      print('Stopped after {:,} rounds without converging, the {} is within ±{:.2%}'.format(accumulator.count, target, accumulator.relative_error(target)))
+  return accumulator
+
+def simulation(sim_details: list[SimulationDetails], board: list[Tile], num_rounds: int, num_dices: list[int], points_to_meet: int, csv: bool = False, save_history: bool = False, engine: str = 'scalar', workers: int = 1, seed: int = None, target_error: float = None, target: str = 'ppid', check_every: int = 10000, checkpoint: str = None, output_format: str = 'csv', history_every: int = 1, history_capacity: int = 1_000_000, variance_reduction: list[str] = [], policy: MultiplierPolicy = None):
+  """Run simulations to get the average PPID using a specified number of starting dice. A single run will only end after all starting dice and free dice received in the run are used.
+
+  Args:
+    sim_details (list[SimulationDetails]): List of multipliers to run
+    board (list[Tile]): The board
+    num_rounds (int): The number of times to run simulation. If target_error is set, this is the most we will run.
+    num_dices (list[int]): List of the number of dice to start each simulation with
+    points_to_meet (int): Number of points to aim for. The sim will stop if we reach this threshold even if we didn't use all starting dice.
+    output_csv (bool): Whether we should output the runs to generated/{label}.csv. Rounds are written in chunks as they finish so they are never all in memory.
+    save_history (bool): Whether we should save the state of run after every single roll to generated/history/{label}/{starting dice}. Will slow down sim.
+    engine (str): 'scalar' to simulate one run at a time or 'batch' to simulate 10,000 runs at a time with numpy
+    workers (int): Number of processes to shard the rounds across
+    seed (int): Seed for the random streams. The results are reproducible for the same seed and number of workers.
+    target_error (float): Stop each starting dice of each multiplier map early once the 95% confidence interval of the target is within this much of it, e.g. 0.005 for ±0.5%. None to always run num_rounds.
+    target (str): 'ppid' or 'success_rate' (of meeting points_to_meet) to aim target_error at
+    check_every (int): Number of rounds to run between checks of the confidence interval when target_error is set, and between saves when checkpoint is set
+    checkpoint (str): Directory to save the rounds of every multiplier map and starting dice to as we go, e.g. 'generated/checkpoints'. Running again with the same directory resumes from the saved rounds, and a bigger num_rounds adds more rounds.
+    output_format (str): 'csv' or 'parquet' (needs pyarrow) for the file written when output_csv is set
+    history_every (int): Only save the history of every this many runs when save_history is set
+    history_capacity (int): Number of rolls of history each process holds in memory before writing them to disk when save_history is set
+    variance_reduction (list[str]): Any of 'antithetic' (pair every round with one that rolls the opposite dice and spins), 'control_variates' (take out the luck of every spin and roll compared to the expected value of the tile)
+      and 'stratified' (spread the spins of every step evenly across rounds). Needs engine='batch'. Prints a variance reduced PPID along with how much less variance it has, and target_error aims at it.
+    policy (MultiplierPolicy): Policy to pick the multipliers with until points_to_meet is met instead of each map, e.g. get_multiplier_policy(board, points_to_meet, max(num_dices)).
+      The maps are still used to chase the next roll dice breakpoint. None to only use the maps.
+  """
+  if (variance_reduction and engine != 'batch'):
+    raise ValueError("variance_reduction needs engine='batch'")
+  if (variance_reduction and checkpoint is not None):
+    raise ValueError("variance_reduction can't be used with a checkpoint, which only saves the stats of every round")
+  # check the methods and the policy up front rather than in every shard
+  VarianceReducedEstimate(variance_reduction)
+  if (policy is not None):
+    policy.check_goal(points_to_meet)
+    policy.check_board(board)
+  executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+  try:
+    # queue up every shard so the pool keeps working while we print results.
+    # with a target error or a checkpoint we run check_every rounds at a time instead.
+    chunked = target_error is not None or checkpoint is not None
+    history_every = history_every if save_history else 0
+    history_directory = lambda label, dices: os.path.join('generated', 'history', label, str(dices))
+    jobs = []
+    for i, sim in enumerate(sim_details):
+      jobs.append([
+        submit_shards(executor, simulate_rounds, (board, sim.multipliers, dices, points_to_meet, engine, variance_reduction, policy, csv, history_every, history_capacity, history_directory(sim.label, dices)), num_rounds, workers, numpy.random.SeedSequence(seed, spawn_key=(i, j)), 0)
+        if not chunked else None
+        for j, dices in enumerate(num_dices)
+      ])
+
+    for i, (sim, sim_jobs) in enumerate(zip(sim_details, jobs)):
+      print(sim.label)
+      if (csv):
+        os.makedirs('generated', exist_ok=True)
+      writer = RoundsWriter(f"generated/{sim.label}.{output_format}", output_format) if csv else None
+      for j, (dices, job) in enumerate(zip(num_dices, sim_jobs)):
+        write = (lambda dataset, dices=dices: writer.write(dataset, sim.label, dices)) if writer is not None else None
+        if (target_error is None):
+          print('Simulation of {:,} players starting with {:,} dice each trying to reach {:,} points:'.format(num_rounds, dices, points_to_meet))
+        else:
+          print('Simulation of up to {:,} players starting with {:,} dice each trying to reach {:,} points, until the {} is within ±{:.2%}:'.format(num_rounds, dices, points_to_meet, target, target_error))
+        print('Applied Multipliers: {}'.format(sim.multipliers))
+        if (policy is not None):
+          print('Multipliers picked by the policy until the points are met')
+        history = RunHistory(history_every, history_capacity, history_directory(sim.label, dices)) if save_history else None
+        if (not chunked):
+          # the list of jobs only has to hold on to each set of shards until it is collected
+          sim_jobs[j] = None
+          accumulator, _ = collect_shards(*job, write=write, history=history)
+          job = None
+        else:
+          sim_checkpoint = None
+          if (checkpoint is not None):
+            # anything that changes the rounds a seed gives, so rounds of different runs are never mixed
+            config = {
+              'multipliers': list(sim.multipliers), 'num_dice': dices, 'points_to_meet': points_to_meet, 'engine': engine, 'workers': workers, 'variance_reduction': list(variance_reduction),
+              'check_every': check_every, 'board': compile_board(board).fingerprint_hash,
+            }
+            if (policy is not None):
+              config['policy'] = { 'max_dice': policy.max_dice, 'points_step': policy.points_step, 'tolerance': policy.tolerance, 'table': hashlib.sha256(policy.table.tobytes()).hexdigest() }
+            sim_checkpoint = Checkpoint(os.path.join(checkpoint, sim.label, str(dices)), config, seed)
+          accumulator = simulate_in_chunks(executor, (board, sim.multipliers, dices, points_to_meet, engine, variance_reduction, policy), num_rounds, workers, numpy.random.SeedSequence(seed, spawn_key=(i, j)), check_every, write, target_error, target, sim_checkpoint, history)
+        output_accumulated_stats(accumulator)
+        if (history is not None):
+          history.flush()
+          print(f"Saved history of every {history_every} runs to {history.directory}")
+      if (writer is not None):
+        writer.close()
+        print(f"Wrote {writer.rows:,} rounds to {writer.path}")
+  finally:
+    if (executor is not None):
+      executor.shutdown(cancel_futures=True)
+
+# tile types that can be used in a board file, by the name used for them in the file
+tile_types = { tile_type.__name__: tile_type for tile_type in [FlatTile, GrandPrizeTile, PointWheelTile, FateWheelTile] }
+
+def load_board(path: str):
+  """Load a board from a JSON file. The file is a list of tiles in order around the board, each with its type and any
+  arguments of that type, e.g. [{ "type": "FlatTile", "points": 400 }, { "type": "GrandPrizeTile" }, ...]
+
+  Args:
+    path (str): Path of the file
+
+  Returns:
+    list[Tile]: The board
+  """
+  with open(path) as file:
+    tiles = json.load(file)
+  board = []
+  for i, tile in enumerate(tiles):
+    arguments = dict(tile)
+    tile_type = arguments.pop('type', None)
+    if (tile_type not in tile_types):
+      raise ValueError(f"Tile {i} of {path} has unknown type {tile_type}. Use one of {', '.join(tile_types)}")
+    board.append(tile_types[tile_type](**arguments))
+  return board
+
+def load_maps(path: str):
+  """Load multiplier maps from a JSON file. The file is a list of maps, each with a label and the multiplier to apply when
+  rolling from each tile of the board, e.g. [{ "label": "5x10", "multipliers": [1, 1, ..., 10, 1] }, ...]
+
+  Args:
+    path (str): Path of the file
+
+  Returns:
+    list[SimulationDetails]: The multiplier maps
+  """
+  with open(path) as file:
+    maps = json.load(file)
+  return [SimulationDetails(multiplier_map['label'], multiplier_map['multipliers']) for multiplier_map in maps]
+
+board = [
+  FlatTile(points=400),
+  FlatTile(gems=50),
+  FlatTile(points=50),
+  FlatTile(points=400),
+  FlatTile(points=800),
+  FlatTile(points=50),
+  FlatTile(dice=2),
+  FlatTile(gems=50),
+  GrandPrizeTile(),
+  FlatTile(),           # GREEN PRESENT
+  PointWheelTile(),
+  FlatTile(points=50),
+  FlatTile(points=200),
+  FlatTile(),           # GREEN PRESENT
+  FlatTile(dice=2),
+  FlatTile(points=200),
+  FlatTile(points=800),
+  FlatTile(),           # GREEN PRESENT
+  FlatTile(points=50),
+  FlatTile(points=200),
+  PointWheelTile(),
+  FlatTile(),           # GREEN PRESENT
+  FateWheelTile(),
+  FlatTile(points=200),
+]
+
+sims = [
+  # SimulationDetails('BestMultipliers', calc_best_multipliers(board, 10)),
+  SimulationDetails('5x10', [ 1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 10, 1 ]),
+  SimulationDetails('bublite', [1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 10, 10, 10, 10]),
+]
+
+def calculate_success_rate(goal_points: int, num_dice: int, current_points: int = 0, rolls_done: int = 0, current_tile: int = 0, engine: str = 'scalar', seed: int = None, board: list[Tile] = board, multipliers: list[int] = sims[1].multipliers, verbose: bool = True):
+  """Run 10,000 simulations and get how many of those runs were able to achieve the goal set
+
+  Args:
+    goal_points (int): The number of points to aim for
     num_dice (int): The number of dice we have
     current_points (int, optional): The current number of points we have. Defaults to 0.
     rolls_done (int, optional): The number of rolls we have done. Defaults to 0.
     current_tile (int, optional): The current tile we are on. Defaults to 0.
+    engine (str, optional): 'scalar' to simulate one run at a time, 'batch' to simulate every run at once with numpy or 'exact' to work out the chance with SuccessRateSolver instead of simulating. Defaults to 'scalar'.
+    seed (int, optional): Seed for the simulated runs. Defaults to None.
+    board (list[Tile], optional): The board. Defaults to board.
+    multipliers (list[int], optional): The multipliers to apply when rolling from each tile. Defaults to the bublite map.
+    verbose (bool, optional): Whether to print the success rate. Defaults to True.
+
+  Returns:
+    float: Success rate as a percentage
   """
-  num_success = 0
-  num_runs = 10_000
-  for i in range(num_runs):
+  def get_initial_result():
     initial_result = SimResult()
     # add dice_used but clear out free_dice so it doesn't bleed over
     initial_result.add_rolls(rolls_done)
@@ -513,37 +2915,450 @@ def calculate_success_rate(goal_points: int, num_dice: int, current_points: int
     initial_result.stats[Stat.EXTRA_DICE] = 0
     # set tile
     initial_result.stats[Stat.TILE] = current_tile
-    run = simulate_single_run(board, sims[1].multipliers, num_dice + rolls_done, math.inf, prev_run=initial_result)
-    if (run.stats[Stat.POINTS] >= goal_points):
-      num_success += 1
+    return initial_result
+
+  if (engine == 'exact'):
+    initial_result = get_initial_result()
+    dice_left = num_dice + initial_result.stats[Stat.EXTRA_DICE]
+    solver = get_success_rate_solver(board, multipliers, goal_points, dice_left, rolls_done)
+    success_rate = solver.success_probability(current_tile, current_points, rolls_done, dice_left) * 100
+    if (verbose):
+      print(f'Success rate: {success_rate}%')
+    return success_rate
+
+  num_success = 0
+  num_runs = 10_000
+  if (engine == 'batch'):
+    runs = simulate_batch_runs(board, multipliers, num_dice + rolls_done, math.inf, num_runs, prev_run=get_initial_result(), rng=numpy.random.default_rng(seed))
+    num_success = int(numpy.count_nonzero(runs.stats[Stat.POINTS] >= goal_points))
+  else:
+    if (seed is not None):
+      random.seed(seed)
+    for i in range(num_runs):
+      run = simulate_single_run(board, multipliers, num_dice + rolls_done, math.inf, prev_run=get_initial_result())
+      if (run.stats[Stat.POINTS] >= goal_points):
+        num_success += 1
   success_rate = (num_runs - 1 if num_success == num_runs else num_success) / num_runs * 100
-  print(f'Success rate: {success_rate}%')
+  if (verbose):
+    print(f'Success rate: {success_rate}%')
+  return success_rate
 
-def simulation_tiers(tiers: dict[int, SimulationDetails], board: list[Tile], num_rounds: int, num_dice: int, verbose: bool = False):
+def simulate_tiered_run(tiers: dict[int, SimulationDetails], board: list[Tile], num_dice: int, verbose: bool = False):
+  """Simulate a single run that aims for each points tier in turn, switching multipliers once a tier is met
+
+  Args:
+    tiers (dict[int, SimulationDetails]): Points to aim for mapped to the multipliers to use until we meet them
+    board (list[Tile]): The board
+    num_dice (int): Number of dice to start with
+    verbose (bool, optional): Whether to print the progress through each tier. Defaults to False.
+
+  Returns:
+    SimResult: Result of simulation
+  """
   points_to_meet_list = list(tiers.keys())
   points_to_meet_list.sort()
-  print(f"Simulation of {num_rounds:,} players starting with {num_dice:,} dice each trying to reach {points_to_meet_list[-1]:,} points:")
-  print(f"This will be done in steps where we will aim for an intermediate goal then pivot to another strategy. The steps and respective multipliers are: {tiers}")
-  dataset = {}
+  result = SimResult()
+  for j in range(len(points_to_meet_list)):
+    points_to_meet = points_to_meet_list[j]
+    sim_details = tiers[points_to_meet]
+    if verbose:
+      print(f"Going for {points_to_meet:,} points using multipliers {sim_details.multipliers}")
+      print(f"At {result.stats[Stat.POINTS]} points. Already rolled {result.stats[Stat.ROLLS_DONE]} times. Used {result.stats[Stat.INITIAL_DICE]} dice.")
+    result = simulate_single_run(board, sim_details.multipliers, num_dice, points_to_meet, prev_run=result, skip_next_bp=(j < len(points_to_meet_list)-1))
+    # Left over dice is original amount - number of dice used + number of free dice rolling that was unused
+    dice = num_dice - result.stats[Stat.INITIAL_DICE] + result.stats[Stat.EXTRA_DICE]
+    if dice == 0: # No more dice, quit early
+      break
+    if verbose:
+      print(f"Got to {result.stats[Stat.POINTS]:,} with {dice:,} left")
+  return result
+
+def simulate_tiered_rounds(tiers: dict[int, SimulationDetails], board: list[Tile], num_dice: int, verbose: bool, num_rounds: int, seed: numpy.random.SeedSequence):
+  """Simulate a shard of tiered rounds using its own random stream. This is what every worker of the process pool runs.
+
+  Args:
+    tiers (dict[int, SimulationDetails]): Points to aim for mapped to the multipliers to use until we meet them
+    board (list[Tile]): The board
+    num_dice (int): Number of dice to start each round with
+    verbose (bool): Whether to print the progress of each round
+    num_rounds (int): The number of rounds to simulate
+    seed (numpy.random.SeedSequence): Seed of the random stream for this shard
+
+  Returns:
+    tuple[StatsAccumulator, None, None]: accumulated stats of the shard, no dataset or history since tiered rounds are never kept
+  """
+  seed_random(seed)
+  accumulator = StatsAccumulator(max(tiers))
   for i in range(num_rounds):
     if verbose:
       print(f"Round #{i+1:,}")
-    result = SimResult()
-    for j in range(len(points_to_meet_list)):
-      points_to_meet = points_to_meet_list[j]
-      sim_details = tiers[points_to_meet]
-      if verbose:
-        print(f"Going for {points_to_meet:,} points using multipliers {sim_details.multipliers}")
-        print(f"At {result.stats[Stat.POINTS]} points. Already rolled {result.stats[Stat.ROLLS_DONE]} times. Used {result.stats[Stat.INITIAL_DICE]} dice.")
-      result = simulate_single_run(board, sim_details.multipliers, num_dice, points_to_meet, prev_run=result, skip_next_bp=(j < len(points_to_meet_list-1)))
-      # Left over dice is original amount - number of dice used + number of free dice rolling that was unused
-      dice = num_dice - result.stats[Stat.INITIAL_DICE] + result.stats[Stat.EXTRA_DICE]
-      if dice == 0: # No more dice, quit early
+    result = simulate_tiered_run(tiers, board, num_dice, verbose)
+    accumulator.add(result.stats)
+  accumulator.flush()
+  return accumulator, None, None
+
+def simulation_tiers(tiers: dict[int, SimulationDetails], board: list[Tile], num_rounds: int, num_dice: int, verbose: bool = False, workers: int = 1, seed: int = None):
+  """Run simulations that aim for an intermediate goal then pivot to another strategy
+
+  Args:
+    tiers (dict[int, SimulationDetails]): Points to aim for mapped to the multipliers to use until we meet them
+    board (list[Tile]): The board
+    num_rounds (int): The number of times to run simulation
+    num_dice (int): Number of dice to start each simulation with
+    verbose (bool, optional): Whether to print the progress of each round. Defaults to False.
+    workers (int, optional): Number of processes to shard the rounds across. Defaults to 1.
+    seed (int, optional): Seed for the random streams. The results are reproducible for the same seed and number of workers. Defaults to None.
+  """
+  points_to_meet_list = list(tiers.keys())
+  points_to_meet_list.sort()
+  print(f"Simulation of {num_rounds:,} players starting with {num_dice:,} dice each trying to reach {points_to_meet_list[-1]:,} points:")
+  print(f"This will be done in steps where we will aim for an intermediate goal then pivot to another strategy. The steps and respective multipliers are: {tiers}")
+  executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+  try:
+    shards, shard_sizes = submit_shards(executor, simulate_tiered_rounds, (tiers, board, num_dice, verbose), num_rounds, workers, numpy.random.SeedSequence(seed))
+    accumulator, _ = collect_shards(shards, shard_sizes)
+  finally:
+    if (executor is not None):
+      executor.shutdown(cancel_futures=True)
+  output_accumulated_stats(accumulator)
+
+class TierTree:
+  """Tiered strategies merged into a tree where strategies that start with the same tiers share a branch, so every
+  shared tier only has to be simulated once per round before forking into each way the strategies carry on.
+  """
+  def __init__(self, strategies: list[dict[int, SimulationDetails]]):
+    """Build the tree
+
+    Args:
+      strategies (list[dict[int, SimulationDetails]]): Every strategy as points to aim for mapped to the multipliers to use until we meet them
+    """
+    self.strategies = strategies
+    # a node is (children, strategies that end at it) where children maps (points to meet, multipliers) to a node
+    self.root = ({}, [])
+    for i, tiers in enumerate(strategies):
+      node = self.root
+      for points_to_meet in sorted(tiers):
+        node = node[0].setdefault((points_to_meet, tuple(tiers[points_to_meet].multipliers)), ({}, []))
+      node[1].append(i)
+
+  def simulate_run(self, board: list[Tile], num_dice: int):
+    """Simulate a single run of every strategy, sharing the rolls of the tiers they have in common
+
+    Args:
+      board (list[Tile]): The board
+      num_dice (int): Number of dice to start with
+
+    Returns:
+      list[SimResult]: Result of every strategy
+    """
+    results = [None] * len(self.strategies)
+    branches = [(self.root, SimResult())]
+    while (branches):
+      node, result = branches.pop()
+      for (points_to_meet, multipliers), child in node[0].items():
+        # carry on with this tier, leaving the chase of the next roll dice breakpoint to the strategies that end here
+        state = simulate_single_run(board, multipliers, num_dice, points_to_meet, prev_run=result.fork(), skip_next_bp=True)
+        for i in child[1]:
+          results[i] = simulate_single_run(board, multipliers, num_dice, points_to_meet, prev_run=state.fork())
+        if (child[0]):
+          branches.append((child, state))
+    return results
+
+def simulate_tier_sweep_rounds(strategies: list[dict[int, SimulationDetails]], board: list[Tile], num_dice: int, num_rounds: int, seed: numpy.random.SeedSequence):
+  """Simulate a shard of rounds of every strategy using its own random stream. This is what every worker of the process pool runs.
+
+  Args:
+    strategies (list[dict[int, SimulationDetails]]): Every strategy as points to aim for mapped to the multipliers to use until we meet them
+    board (list[Tile]): The board
+    num_dice (int): Number of dice to start each round with
+    num_rounds (int): The number of rounds to simulate
+    seed (numpy.random.SeedSequence): Seed of the random stream for this shard
+
+  Returns:
+    list[StatsAccumulator]: accumulated stats of every strategy
+  """
+  seed_random(seed)
+  tree = TierTree(strategies)
+  accumulators = [StatsAccumulator(max(tiers)) for tiers in strategies]
+  for i in range(num_rounds):
+    for accumulator, result in zip(accumulators, tree.simulate_run(board, num_dice)):
+      accumulator.add(result.stats)
+  for accumulator in accumulators:
+    accumulator.flush()
+  return accumulators
+
+def simulation_tier_sweep(strategies: list[dict[int, SimulationDetails]], board: list[Tile], num_rounds: int, num_dice: int, workers: int = 1, seed: int = None):
+  """Compare tiered strategies. Tiers that strategies start with in common are only simulated once per round and then
+  forked into every way the strategies carry on, e.g. one first tier followed by eight different second tiers.
+
+  Args:
+    strategies (list[dict[int, SimulationDetails]]): Every strategy as points to aim for mapped to the multipliers to use until we meet them
+    board (list[Tile]): The board
+    num_rounds (int): The number of times to run simulation
+    num_dice (int): Number of dice to start each simulation with
+    workers (int, optional): Number of processes to shard the rounds across. Defaults to 1.
+    seed (int, optional): Seed for the random streams. The results are reproducible for the same seed and number of workers. Defaults to None.
+
+  Returns:
+    list[StatsAccumulator]: accumulated stats of every strategy
+  """
+  print(f"Simulation of {num_rounds:,} players starting with {num_dice:,} dice each, for {len(strategies)} tiered strategies:")
+  executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+  try:
+    shards, shard_sizes = submit_shards(executor, simulate_tier_sweep_rounds, (strategies, board, num_dice), num_rounds, workers, numpy.random.SeedSequence(seed))
+    accumulators = [StatsAccumulator(max(tiers)) for tiers in strategies]
+    for shard in shards:
+      for accumulator, shard_accumulator in zip(accumulators, shard.result() if isinstance(shard, Future) else shard):
+        accumulator.merge(shard_accumulator)
+  finally:
+    if (executor is not None):
+      executor.shutdown(cancel_futures=True)
+  for tiers, accumulator in zip(strategies, accumulators):
+    steps = ' -> '.join(f'{points_to_meet:,}: {tiers[points_to_meet].label}' for points_to_meet in sorted(tiers))
+    print(f"{steps}")
+    print(f"  PPID: {accumulator.ppid():.3f} ± {1.96 * accumulator.ppid_standard_error():.3f}, success rate: {accumulator.success_rate():.2%} ± {1.96 * accumulator.success_rate_standard_error():.2%}, average points: {accumulator.mean(Stat.POINTS):,.0f}")
+  return accumulators
+
+def generate_breakpoint_grid(sim_details: SimulationDetails, board: list[Tile], path: str, num_dices: list[int] = range(5, 515, 5), breakpoints: list[int] = [20000, 40000, 60000, 80000, 100000], num_rounds: int = 10000, by_breakpoint: bool = False, seed: int = None):
+  """Write the chance of reaching every breakpoint from every number of starting dice to a CSV for the "should I roll" page.
+
+  Every number of starting dice is simulated once with no points limit. Points only go up and a run never stops early without a
+  points limit, so a run reached a breakpoint if it ends with at least that many points, and one batch gives every breakpoint.
+  A run with N starting dice can only tell it has N dice once the multiplier caps kick in with less than 100 turns left. Until
+  then it rolls exactly like a run with N+5 dice, so every run is only rolled once up to that point and each number of starting
+  dice just plays out its own ending from there.
+
+  Args:
+    sim_details (SimulationDetails): The multipliers to use
+    board (list[Tile]): The board
+    path (str): Where to write the CSV, e.g. 'public/data.csv'
+    num_dices (list[int], optional): Numbers of starting dice, in increasing order. Defaults to 5 to 510 in steps of 5.
+    breakpoints (list[int], optional): Points breakpoints to get the chance of. Defaults to [20000, 40000, 60000, 80000, 100000].
+    num_rounds (int, optional): Number of runs for every number of starting dice. Defaults to 10000.
+    by_breakpoint (bool, optional): Whether to order the rows by breakpoint first instead of by starting dice. Defaults to False.
+    seed (int, optional): Seed for the random stream. Defaults to None.
+
+  Returns:
+    dict[tuple[int, int], float]: Chance of reaching each (starting dice, breakpoint)
+  """
+  rng = numpy.random.default_rng(numpy.random.SeedSequence(seed))
+  compiled = compile_board(board)
+  multipliers = numpy.asarray(sim_details.multipliers)
+  breakpoints = numpy.asarray(breakpoints)
+  # the runs rolled with no multiplier cap, shared by every number of starting dice
+  shared = BatchSimResult(num_rounds)
+  stats = shared.stats
+  chances = {}
+  for num_dice in sorted(num_dices):
+    # roll every run up to the first time it would have less than 100 turns left with num_dice starting dice
+    active = numpy.arange(num_rounds)
+    while (True):
+      active = active[num_dice - stats[Stat.INITIAL_DICE][active] + stats[Stat.EXTRA_DICE][active] >= turn_cap_thresholds[-1]]
+      if (len(active) == 0):
         break
-      if verbose:
-        print(f"Got to {result.stats[Stat.POINTS]:,} with {dice:,} left")
-    add_round_to_dataset(dataset, result.stats)
-    if (i % 10000 == 9999):
-        print(f"{i+1:,} sims done")
-  df = pandas.DataFrame(dataset)
-  output_stats(df)
\ No newline at end of file
+      compiled.batch_roll(shared, active, multipliers[stats[Stat.TILE][active]], rng)
+    result = simulate_batch_runs(compiled, multipliers, num_dice, math.inf, num_rounds, prev_run=shared, rng=rng)
+    met = (result.stats[Stat.POINTS][:, None] >= breakpoints[None, :]).sum(axis=0)
+    for breakpoint, count in zip(breakpoints.tolist(), met.tolist()):
+      chances[num_dice, breakpoint] = count / num_rounds
+    print(f'{num_dice} starting dice done')
+
+  rows = sorted(chances, key=lambda key: (key[1], key[0]) if by_breakpoint else key)
+  lines = ['startingDice,breakpoint,chance']
+  for num_dice, breakpoint in rows:
+    chance = round(chances[num_dice, breakpoint], 4)
+    # the page leaves out chances that are certain either way
+    lines.append(f'{num_dice},{breakpoint},{chance if 0 < chance < 1 else ""}')
+  with open(path, 'w') as file:
+    file.write('\n'.join(lines))
+  return chances
+
+def generate_should_roll_data(board: list[Tile] = board, num_rounds: int = 10000, seed: int = None):
+  """Regenerate public/data.csv (5x10) and public/6x10data.csv (6x10, bublite) for the "should I roll" page
+
+  Args:
+    board (list[Tile], optional): The board. Defaults to board.
+    num_rounds (int, optional): Number of runs for every number of starting dice. Defaults to 10000.
+    seed (int, optional): Seed for the random streams. Defaults to None.
+  """
+  generate_breakpoint_grid(sims[0], board, 'public/data.csv', range(5, 515, 5), num_rounds=num_rounds, seed=seed)
+  generate_breakpoint_grid(sims[1], board, 'public/6x10data.csv', range(5, 555, 5), num_rounds=num_rounds, by_breakpoint=True, seed=seed)
+
+def simulate_ppid_rounds(board: list[Tile], multipliers: list[int], num_dice_rolls: int, points_to_meet: int, relative_accuracy: float, num_rounds: int, seed: numpy.random.SeedSequence):
+  """Simulate a shard of rounds with the batch engine and sketch the PPID of every round. This is what every worker runs for generate_ppid_data.
+
+  Args:
+    board (list[Tile]): The board
+    multipliers (list[int]): The multipliers to apply when rolling from each tile
+    num_dice_rolls (int): Number of dice to start each round with
+    points_to_meet (int): Number of points to aim for
+    relative_accuracy (float): Accuracy of the sketch
+    num_rounds (int): The number of rounds to simulate
+    seed (numpy.random.SeedSequence): Seed of the random stream for this shard
+
+  Returns:
+    QuantileSketch: PPID of every round of the shard. Rounds that didn't use up any dice have no PPID and are left out.
+  """
+  stats = simulate_batch_runs(board, multipliers, num_dice_rolls, points_to_meet, num_rounds, rng=numpy.random.default_rng(seed)).stats
+  dice_used = stats[Stat.INITIAL_DICE] - stats[Stat.EXTRA_DICE]
+  sketch = QuantileSketch(relative_accuracy)
+  sketch.add(stats[Stat.POINTS][dice_used > 0] / dice_used[dice_used > 0])
+  return sketch
+
+def generate_ppid_data(sim_details: SimulationDetails = sims[0], board: list[Tile] = board, path: str = 'public/ppid_data.csv', num_rounds: int = 1_000_000, num_dice: int = 400, points_to_meet: int = 100_000, num_rows: int = 10000, relative_accuracy: float = 0.0005, workers: int = 1, seed: int = None):
+  """Regenerate public/ppid_data.csv, the table of PPID percentiles the PPID calculator page ranks a run against.
+  Every worker sketches the PPID of its rounds and the sketches are merged, so memory stays the same for any number of rounds.
+
+  Args:
+    sim_details (SimulationDetails, optional): The multipliers to run. Defaults to 5x10.
+    board (list[Tile], optional): The board. Defaults to board.
+    path (str, optional): CSV file to write. Defaults to 'public/ppid_data.csv'.
+    num_rounds (int, optional): The number of rounds to simulate. Defaults to 1,000,000.
+    num_dice (int, optional): Number of dice to start each round with. Defaults to 400.
+    points_to_meet (int, optional): Number of points to aim for. Defaults to 100,000.
+    num_rows (int, optional): Number of percentiles to write, evenly spaced from the lowest PPID to the highest. Defaults to 10000.
+    relative_accuracy (float, optional): How far a percentile can be from the real one as a fraction of it. Defaults to 0.0005.
+    workers (int, optional): Number of processes to shard the rounds across. Defaults to 1.
+    seed (int, optional): Seed for the random streams. Defaults to None.
+
+  Returns:
+    QuantileSketch: PPID of every round
+  """
+  executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+  try:
+    shards, _ = submit_shards(executor, simulate_ppid_rounds, (board, sim_details.multipliers, num_dice, points_to_meet, relative_accuracy), num_rounds, workers, numpy.random.SeedSequence(seed))
+    sketch = QuantileSketch(relative_accuracy)
+    for i, shard in enumerate(shards):
+      sketch.merge(shard.result() if isinstance(shard, Future) else shard)
+      if (isinstance(shards, list)):
+        # let go of the shard's sketch once it is merged
+        shards[i] = None
+  finally:
+    if (executor is not None):
+      executor.shutdown(cancel_futures=True)
+
+  percentiles = sketch.quantiles(numpy.linspace(0, 1, num_rows))
+  # the page reads the ppid column of every row, and every row ends with a comma
+  lines = ['ppid,'] + [f'{value:.10g},' for value in percentiles.tolist()]
+  with open(path, 'w') as file:
+    file.write('\n'.join(lines))
+  print(f'Wrote {num_rows:,} PPID percentiles of {sketch.count:,} rounds to {path}')
+  return sketch
+
+def parse_number(value: str):
+  """Parse a number of dice or points from the command line, where 'inf' means no limit
+  """
+  return math.inf if value == 'inf' else int(value)
+
+def find_maps(maps: list[SimulationDetails], labels: list[str]):
+  """Get the multiplier maps with the given labels
+
+  Args:
+    maps (list[SimulationDetails]): Every multiplier map
+    labels (list[str]): Labels of the maps to get
+
+  Returns:
+    list[SimulationDetails]: The maps in the order of the labels
+  """
+  by_label = { sim_details.label: sim_details for sim_details in maps }
+  for label in labels:
+    if (label not in by_label):
+      raise SystemExit(f"Unknown multiplier map {label}. Use one of {', '.join(by_label)}")
+  return [by_label[label] for label in labels]
+
+def main(argv: list[str] = None):
+  common = argparse.ArgumentParser(add_help=False)
+  common.add_argument('--board', help='JSON file of the board (default the board in simulate.py)')
+  common.add_argument('--maps', help='JSON file of the multiplier maps (default sims in simulate.py)')
+  common.add_argument('--seed', type=int, help='seed for the random streams')
+  parser = argparse.ArgumentParser(description='Simulate Archero 2 Island Treasure Hunt. Run with no command (e.g. python -i simulate.py) to use the functions directly.')
+  commands = parser.add_subparsers(dest='command')
+
+  simulate_parser = commands.add_parser('simulate', parents=[common], help='simulate multiplier maps and print their stats')
+  simulate_parser.add_argument('--map', action='append', dest='labels', help='label of a multiplier map to simulate, can be repeated (default every map)')
+  simulate_parser.add_argument('--rounds', type=int, default=10_000, help='number of rounds to simulate (default 10,000)')
+  simulate_parser.add_argument('--dice', type=parse_number, nargs='+', required=True, help="numbers of dice to start with, 'inf' for no limit")
+  simulate_parser.add_argument('--points', type=parse_number, default=math.inf, help="points to aim for (default 'inf' for no limit)")
+  simulate_parser.add_argument('--engine', choices=['scalar', 'batch'], default='batch', help='simulation engine (default batch)')
+  simulate_parser.add_argument('--workers', type=int, default=1, help='number of processes (default 1)')
+  simulate_parser.add_argument('--target-error', type=float, help='stop once the 95%% confidence interval is within this much of the target, e.g. 0.005')
+  simulate_parser.add_argument('--target', choices=['ppid', 'success_rate'], default='ppid', help='what --target-error aims at (default ppid)')
+  simulate_parser.add_argument('--checkpoint', help='directory to save the rounds to as we go and resume from')
+  simulate_parser.add_argument('--csv', action='store_true', help='write the rounds to generated/{label}.csv')
+  simulate_parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='format of the file written with --csv (default csv)')
+  simulate_parser.add_argument('--variance-reduction', nargs='+', choices=VarianceReducedEstimate.known_methods, default=[], help='variance reduction methods to simulate with on the batch engine')
+  simulate_parser.add_argument('--policy', nargs='?', const=True, metavar='FILE', help='pick the multipliers with the multiplier policy for --points until they are met, worked out before simulating or loaded from a file saved by the policy command')
+
+  policy_parser = commands.add_parser('policy', parents=[common], help='work out the multiplier policy for a goal and save it')
+  policy_parser.add_argument('goal', type=int, help='points to aim for')
+  policy_parser.add_argument('dice', type=int, help='most dice a run starts with')
+  policy_parser.add_argument('--output', help='npz file to save the policy to (default generated/policy_{goal}.npz)')
+
+  tiers_parser = commands.add_parser('tiers', parents=[common], help='simulate switching multiplier maps once each points tier is met')
+  tiers_parser.add_argument('--tier', action='append', required=True, metavar='POINTS:MAP', help='points to aim for and the label of the map to use until then, e.g. 20000:5x10. Repeat for every tier.')
+  tiers_parser.add_argument('--rounds', type=int, default=10_000, help='number of rounds to simulate (default 10,000)')
+  tiers_parser.add_argument('--dice', type=parse_number, required=True, help='number of dice to start with')
+  tiers_parser.add_argument('--workers', type=int, default=1, help='number of processes (default 1)')
+
+  success_rate_parser = commands.add_parser('success-rate', parents=[common], help='chance of reaching a number of points from where we are')
+  success_rate_parser.add_argument('goal', type=int, help='points to aim for')
+  success_rate_parser.add_argument('dice', type=int, help='number of dice we have')
+  success_rate_parser.add_argument('--current-points', type=int, default=0, help='points we have (default 0)')
+  success_rate_parser.add_argument('--rolls-done', type=int, default=0, help='rolls we have done (default 0)')
+  success_rate_parser.add_argument('--tile', type=int, default=0, help='tile we are on (default 0)')
+  success_rate_parser.add_argument('--map', default='bublite', dest='label', help='label of the multiplier map to use (default bublite)')
+  success_rate_parser.add_argument('--engine', choices=['scalar', 'batch', 'exact'], default='batch', help='simulation engine, or exact to work it out (default batch)')
+
+  best_multipliers_parser = commands.add_parser('best-multipliers', parents=[common], help='print the best multiplier map of the board for each multiplier')
+  best_multipliers_parser.add_argument('--multiplier', type=int, action='append', dest='multipliers', help='multiplier to set around the board, can be repeated (default 2, 3, 5 and 10)')
+  args = parser.parse_args(argv)
+
+  if (args.command is None):
+    return
+  command_board = load_board(args.board) if args.board else board
+  maps = load_maps(args.maps) if args.maps else sims
+
+  if (args.command == 'simulate'):
+    sim_details = find_maps(maps, args.labels) if args.labels else maps
+    policy = None
+    if (args.policy is not None and args.points == math.inf):
+      simulate_parser.error('--policy needs a finite --points to aim for')
+    if (args.policy is True):
+      if (math.inf in args.dice):
+        simulate_parser.error('--policy needs a finite number of --dice to work the policy out for, or a policy FILE')
+      policy = get_multiplier_policy(command_board, args.points, max(args.dice))
+    elif (args.policy is not None):
+      try:
+        policy = load_policy(args.policy, command_board)
+      except ValueError as error:
+        simulate_parser.error(str(error))
+      if (policy.goal_points != args.points):
+        simulate_parser.error(f'the policy in {args.policy} was worked out for {policy.goal_points:,} points, not {args.points:,}')
+    simulation(sim_details, command_board, args.rounds, args.dice, args.points, csv=args.csv, engine=args.engine, workers=args.workers, seed=args.seed,
+      target_error=args.target_error, target=args.target, checkpoint=args.checkpoint, output_format=args.format, variance_reduction=args.variance_reduction, policy=policy)
+  elif (args.command == 'policy'):
+    start = time.perf_counter()
+    policy = get_multiplier_policy(command_board, args.goal, args.dice)
+    path = args.output or f'generated/policy_{args.goal}.npz'
+    if (os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+    policy.save(path)
+    print(f'Worked out the policy for {args.goal:,} points in {time.perf_counter() - start:.1f}s and saved it to {path}')
+  elif (args.command == 'tiers'):
+    tier_maps = {}
+    for tier in args.tier:
+      points, _, label = tier.partition(':')
+      tier_maps[int(points)] = find_maps(maps, [label])[0]
+    simulation_tiers(tier_maps, command_board, args.rounds, args.dice, workers=args.workers, seed=args.seed)
+  elif (args.command == 'success-rate'):
+    multipliers = find_maps(maps, [args.label])[0].multipliers
+    calculate_success_rate(args.goal, args.dice, args.current_points, args.rolls_done, args.tile, engine=args.engine, seed=args.seed, board=command_board, multipliers=multipliers)
+  elif (args.command == 'best-multipliers'):
+    multipliers = args.multipliers or [2, 3, 5, 10]
+    # printed as a maps file so it can be saved and passed to --maps
+    best = calc_best_multipliers_batch([command_board], multipliers)[0]
+    print('[\n' + ',\n'.join(f"  {json.dumps({ 'label': f'{multiplier}x', 'multipliers': row })}" for multiplier, row in zip(multipliers, best.tolist())) + '\n]')
+
+if __name__ == '__main__':
+  # with no command this does nothing, so python -i simulate.py still goes straight to the prompt
+  main()